@@ -1,9 +1,14 @@
 from django.contrib import admin
+from django.db import transaction
 from django.shortcuts import redirect, reverse
 from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
 
+from location.geocoding import enqueue_geocoding
+
+from .candidates import schedule_refresh
+from .paginators import ApproximateCountPaginator
 from .models import (
     Order,
     OrderItem,
@@ -17,6 +22,14 @@ from .models import (
 class RestaurantMenuItemInline(admin.TabularInline):
     model = RestaurantMenuItem
     extra = 0
+    autocomplete_fields = ["restaurant", "product"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("restaurant", "product")
+        )
 
 
 @admin.register(Restaurant)
@@ -48,6 +61,12 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = [
         "category",
     ]
+    list_select_related = [
+        "category",
+    ]
+    autocomplete_fields = [
+        "category",
+    ]
     search_fields = [
         # FIXME SQLite can not convert letter case for cyrillic words properly, so search will be buggy.
         # Migration to PostgreSQL is necessary
@@ -111,30 +130,101 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProductCategory)
-class ProductAdmin(admin.ModelAdmin):
-    pass
+class ProductCategoryAdmin(admin.ModelAdmin):
+    search_fields = [
+        "name",
+    ]
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    autocomplete_fields = ["product"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product")
+
+
+def make_transition_action(status, description):
+    @admin.action(description=description)
+    def transition_orders(modeladmin, request, queryset):
+        selected = queryset.count()
+        transitioned = queryset.transition(status)
+        modeladmin.message_user(
+            request,
+            f"Статус изменён у заказов: {transitioned}, "
+            f"пропущено: {selected - transitioned}",
+        )
+
+    transition_orders.__name__ = f"transition_to_{status}"
+    return transition_orders
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", )
     inlines = [OrderItemInline]
+    list_display = [
+        "id",
+        "status",
+        "payment",
+        "firstname",
+        "lastname",
+        "address",
+        "restaurant",
+        "total",
+        "created_at",
+    ]
+    list_filter = [
+        "status",
+        "payment",
+    ]
+    list_select_related = [
+        "restaurant",
+    ]
+    autocomplete_fields = [
+        "restaurant",
+    ]
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = [
+        make_transition_action("delivering", "Передать в доставку"),
+        make_transition_action("completed", "Отметить выполненными"),
+        make_transition_action("canceled", "Отменить"),
+    ]
 
     def save_formset(self, request, form, formset, change):
+        if formset.model is not OrderItem:
+            return super().save_formset(request, form, formset, change)
+
         instances = formset.save(commit=False)
+        products = Product.objects.in_bulk(
+            {instance.product_id for instance in instances}
+        )
         for instance in instances:
-            instance.price = instance.product.price
-            instance.save()
+            instance.price = products[instance.product_id].price
+
+        with transaction.atomic():
+            OrderItem.objects.filter(
+                pk__in=[item.pk for item in formset.deleted_objects]
+            ).delete()
+            OrderItem.objects.bulk_create(
+                [instance for instance in instances if instance.pk is None]
+            )
+            OrderItem.objects.bulk_update(
+                [instance for instance in instances if instance.pk],
+                ["product", "quantity", "price"],
+            )
+            Order.objects.filter(pk=form.instance.pk).update_totals()
+            schedule_refresh([form.instance.pk])
 
     def save_model(self, request, obj, form, change):
         if "restaurant" in form.changed_data:
             obj.status = "prepared"
         super().save_model(request, obj, form, change)
+        if "address" in form.changed_data:
+            enqueue_geocoding([obj.address])
+            schedule_refresh([obj.pk])
 
     def response_change(self, request, obj):
         response = super().response_change(request, obj)
@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from location.distances import has_coordinates, refine_distances
+from location.geocoding import lookup_many_coordinates
+from location.models import Location
+from location.spatial import GridIndex
+
+from .matching import RestaurantMatcher
+from .models import (
+    Order,
+    OrderCandidate,
+    OrderItem,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+
+def build_zone_candidates(orders, restaurants):
+    restaurants = list(restaurants.only("id", "address"))
+    matcher = RestaurantMatcher.from_db(restaurants)
+
+    coordinates = lookup_many_coordinates(
+        [restaurant.address for restaurant in restaurants]
+        + [order.address for order in orders]
+    )
+    restaurants_coords = {
+        restaurant.id: coordinates[restaurant.address]
+        for restaurant in restaurants
+    }
+    index = GridIndex(restaurants_coords)
+
+    candidates = []
+    for order in orders:
+        restaurant_ids = set(
+            matcher.find_restaurants(
+                item.product_id for item in order.order_items.all()
+            )
+        )
+        if not restaurant_ids:
+            continue
+
+        order_coords = coordinates[order.address]
+        ranked = []
+        if has_coordinates(order_coords):
+            ranked = refine_distances(
+                order_coords,
+                index.nearest(
+                    *order_coords,
+                    max_km=settings.MAX_DELIVERY_DISTANCE_KM,
+                    keys=restaurant_ids,
+                ),
+                restaurants_coords,
+                settings.PRECISE_DISTANCES_TOP_N,
+            )
+        ranked.extend(
+            (restaurant_id, None)
+            for restaurant_id in restaurant_ids
+            if not has_coordinates(order_coords) or restaurant_id not in index
+        )
+
+        candidates.extend(
+            OrderCandidate(
+                order=order,
+                restaurant_id=restaurant_id,
+                distance=distance,
+            )
+            for restaurant_id, distance in ranked
+        )
+    return candidates
+
+
+def build_candidates(orders):
+    orders_by_zone = defaultdict(list)
+    for order in orders:
+        orders_by_zone[order.zone_id].append(order)
+
+    candidates = []
+    for zone_id, zone_orders in orders_by_zone.items():
+        restaurants = Restaurant.objects.all()
+        if zone_id:
+            restaurants = restaurants.filter(
+                Q(zone_id=zone_id) | Q(zone__isnull=True)
+            )
+        candidates.extend(build_zone_candidates(zone_orders, restaurants))
+    return candidates
+
+
+def refresh_candidates(order_ids):
+    order_ids = list(order_ids)
+    orders = list(
+        Order.objects.filter(id__in=order_ids)
+        .only("id", "address", "zone")
+        .prefetch_related("order_items")
+    )
+    candidates = build_candidates(orders)
+    with transaction.atomic():
+        OrderCandidate.objects.filter(order_id__in=order_ids).delete()
+        OrderCandidate.objects.bulk_create(candidates)
+    return len(candidates)
+
+
+def schedule_refresh(order_ids):
+    Order.objects.filter(id__in=order_ids).update(candidates_outdated=True)
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def refresh_order_candidates(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, QuerySet) and origin.model is OrderItem:
+        return
+    schedule_refresh([instance.order_id])
+
+
+@receiver([post_save, post_delete], sender=RestaurantMenuItem)
+def refresh_product_candidates(sender, instance, **kwargs):
+    schedule_refresh(
+        Order.objects.active()
+        .filter(order_items__product_id=instance.product_id)
+        .values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Restaurant)
+def refresh_restaurant_candidates(sender, instance, **kwargs):
+    schedule_refresh(
+        Order.objects.active()
+        .filter(candidates__restaurant=instance)
+        .values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Location)
+def apply_location(sender, instance, **kwargs):
+    if not instance.updated_at:
+        return
+
+    restaurants = Restaurant.objects.filter(address_key=instance.address_key)
+    restaurants.update(zone=instance.zone_id)
+    order_ids = set(
+        Order.objects.active()
+        .filter(candidates__restaurant__in=restaurants)
+        .values_list("id", flat=True)
+    )
+
+    located_orders = Order.objects.active().filter(
+        address_key=instance.address_key
+    )
+    located_orders.update(zone=instance.zone_id, updated_at=timezone.now())
+    order_ids.update(located_orders.values_list("id", flat=True))
+    schedule_refresh(order_ids)
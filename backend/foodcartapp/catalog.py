@@ -0,0 +1,291 @@
+import gzip
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    CatalogChange,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_TIMEOUT = 24 * 60 * 60
+CATALOG_SETTLE_WINDOW = timedelta(seconds=30)
+MENU_KEY = "catalog:menu:{}"
+CHANGE_KINDS = {
+    Product: "product",
+    ProductCategory: "category",
+    RestaurantMenuItem: "menu_item",
+}
+
+
+def dump_category(category):
+    return {
+        "id": category.id,
+        "name": category.name,
+    }
+
+
+def dump_product(product):
+    return {
+        "id": product.id,
+        "name": product.name,
+        "price": product.price,
+        "special_status": product.special_status,
+        "description": product.description,
+        "category": dump_category(product.category)
+        if product.category
+        else None,
+        "image": product.image.url,
+    }
+
+
+def dump_menu_item(menu_item):
+    return {
+        "id": menu_item.id,
+        "restaurant": menu_item.restaurant_id,
+        "product": menu_item.product_id,
+        "availability": menu_item.availability,
+    }
+
+
+def build_catalog():
+    products = Product.objects.select_related("category").available()
+    return [dump_product(product) for product in products]
+
+
+def get_settled_version(since=0):
+    # Change ids are taken on insert, not on commit, so a transaction that
+    # is still open may hold a smaller id than an already visible change.
+    # Clients resume only from changes older than the settle window
+    settled_at = datetime.now(timezone.utc) - CATALOG_SETTLE_WINDOW
+    last_settled_id = (
+        CatalogChange.objects.filter(id__gt=since, created_at__lte=settled_at)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return last_settled_id or since
+
+
+def is_pruned_version(since):
+    first_id = (
+        CatalogChange.objects.order_by("id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return first_id is not None and since < first_id - 1
+
+
+def build_catalog_delta(since):
+    changed_ids = {kind: set() for kind in CHANGE_KINDS.values()}
+    changes = CatalogChange.objects.filter(id__gt=since).values_list(
+        "kind", "object_id"
+    )
+    version = get_settled_version(since)
+    for kind, object_id in changes:
+        changed_ids[kind].add(object_id)
+
+    categories = ProductCategory.objects.filter(
+        id__in=changed_ids["category"]
+    )
+    products = (
+        Product.objects.select_related("category")
+        .available()
+        .filter(
+            Q(id__in=changed_ids["product"])
+            | Q(category_id__in=changed_ids["category"])
+        )
+    )
+    menu_items = RestaurantMenuItem.objects.filter(
+        id__in=changed_ids["menu_item"]
+    )
+
+    delta = {"version": version}
+    for name, kind, objects, dump in [
+        ("products", "product", products, dump_product),
+        ("categories", "category", categories, dump_category),
+        ("availability", "menu_item", menu_items, dump_menu_item),
+    ]:
+        delta[name] = [dump(obj) for obj in objects]
+        found_ids = {obj["id"] for obj in delta[name]}
+        delta[f"removed_{name}"] = sorted(changed_ids[kind] - found_ids)
+    return delta
+
+
+def build_menus(restaurant_ids):
+    menus = {
+        restaurant.id: {
+            "restaurant": {"id": restaurant.id, "name": restaurant.name},
+            "items": [],
+        }
+        for restaurant in Restaurant.objects.filter(id__in=restaurant_ids)
+    }
+    menu_items = (
+        RestaurantMenuItem.objects.filter(restaurant_id__in=menus.keys())
+        .select_related("product__category")
+        .order_by("product__name")
+    )
+    for menu_item in menu_items:
+        item = dump_product(menu_item.product)
+        item["availability"] = menu_item.availability
+        menus[menu_item.restaurant_id]["items"].append(item)
+    return menus
+
+
+def get_menus(restaurant_ids):
+    keys = {
+        MENU_KEY.format(restaurant_id): restaurant_id
+        for restaurant_id in restaurant_ids
+    }
+    menus = {
+        keys[key]: menu for key, menu in cache.get_many(keys).items()
+    }
+    missing_ids = set(restaurant_ids) - menus.keys()
+    if missing_ids:
+        built_menus = build_menus(missing_ids)
+        # add() so that a menu built before a concurrent change commits
+        # does not overwrite the one stored by refresh_menus()
+        for restaurant_id, menu in built_menus.items():
+            cache.add(MENU_KEY.format(restaurant_id), menu, CATALOG_TIMEOUT)
+        menus.update(built_menus)
+    return menus
+
+
+def store_menus(restaurant_ids):
+    menus = build_menus(restaurant_ids)
+    cache.set_many(
+        {
+            MENU_KEY.format(restaurant_id): menu
+            for restaurant_id, menu in menus.items()
+        },
+        CATALOG_TIMEOUT,
+    )
+    cache.delete_many(
+        [
+            MENU_KEY.format(restaurant_id)
+            for restaurant_id in set(restaurant_ids) - menus.keys()
+        ]
+    )
+
+
+def refresh_menus(restaurant_ids):
+    restaurant_ids = set(restaurant_ids)
+    if restaurant_ids:
+        transaction.on_commit(lambda: store_menus(restaurant_ids))
+
+
+def new_catalog_version(previous=None):
+    # Change ids follow insert order, not commit order, so the cached
+    # payload is keyed on a generation that every commit replaces
+    modified_at = time.time()
+    if previous is not None:
+        # Last-Modified is compared with a precision of one second
+        modified_at = max(modified_at, math.floor(previous[1]) + 1)
+    return (uuid4().hex, modified_at)
+
+
+def store_catalog_version():
+    cache.set(
+        CATALOG_VERSION_KEY,
+        new_catalog_version(cache.get(CATALOG_VERSION_KEY)),
+        CATALOG_TIMEOUT,
+    )
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, new_catalog_version(), CATALOG_TIMEOUT)
+        version = cache.get(CATALOG_VERSION_KEY) or new_catalog_version()
+    return version
+
+
+def get_catalog_etag(request):
+    generation, _ = get_catalog_version()
+    since = request.GET.get("since")
+    if since and since.isdigit():
+        settled_version = get_settled_version(int(since))
+        return f'W/"catalog-{generation}-since-{since}-{settled_version}"'
+    if since:
+        return f'W/"catalog-{generation}-since-{since}"'
+    return f'W/"catalog-{generation}"'
+
+
+def get_catalog_last_modified(request):
+    _, modified_at = get_catalog_version()
+    return datetime.fromtimestamp(modified_at, tz=timezone.utc)
+
+
+def encode_payload(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    body = body.encode()
+    return {"body": body, "gzip": gzip.compress(body)}
+
+
+def get_catalog_payload():
+    generation, _ = get_catalog_version()
+    payload_key = f"catalog:payload:{generation}"
+    payload = cache.get(payload_key)
+    if payload is None:
+        payload = encode_payload(build_catalog())
+        payload["version"] = get_settled_version()
+        cache.set(payload_key, payload, CATALOG_TIMEOUT)
+    return payload
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductCategory)
+@receiver([post_save, post_delete], sender=RestaurantMenuItem)
+def record_catalog_change(sender, instance, **kwargs):
+    changes = [CatalogChange(kind=CHANGE_KINDS[sender], object_id=instance.id)]
+    if sender is RestaurantMenuItem:
+        changes.append(
+            CatalogChange(kind="product", object_id=instance.product_id)
+        )
+    CatalogChange.objects.bulk_create(changes)
+    transaction.on_commit(store_catalog_version)
+
+    if sender is RestaurantMenuItem:
+        restaurant_ids = [instance.restaurant_id]
+    elif sender is Product:
+        restaurant_ids = RestaurantMenuItem.objects.filter(
+            product=instance
+        ).values_list("restaurant_id", flat=True)
+    else:
+        restaurant_ids = RestaurantMenuItem.objects.filter(
+            product__category=instance
+        ).values_list("restaurant_id", flat=True)
+    refresh_menus(restaurant_ids)
+
+
+@receiver(pre_delete, sender=ProductCategory)
+def record_category_products_change(sender, instance, **kwargs):
+    # Products lose their category before post_delete, so collect them now
+    product_ids = list(instance.products.values_list("id", flat=True))
+    CatalogChange.objects.bulk_create(
+        CatalogChange(kind="product", object_id=product_id)
+        for product_id in product_ids
+    )
+    refresh_menus(
+        RestaurantMenuItem.objects.filter(
+            product_id__in=product_ids
+        ).values_list("restaurant_id", flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=Restaurant)
+def refresh_restaurant_menu(sender, instance, **kwargs):
+    refresh_menus([instance.id])
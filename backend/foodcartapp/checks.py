@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = [
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+]
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    if settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            "Кэш не общий для воркеров gunicorn: после изменения каталога "
+            "остальные воркеры будут отдавать его старую версию",
+            hint="Укажите в CACHE_URL адрес redis, например "
+            "redis://127.0.0.1:6379/0",
+            id="foodcartapp.W001",
+        )
+    ]
@@ -0,0 +1,79 @@
+import functools
+from datetime import timedelta
+from hashlib import sha1
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+CLAIM_LEASE = timedelta(seconds=30)
+RETRY_AFTER = 1
+
+
+def claim_key(key, request_hash):
+    now = timezone.now()
+    expired_before = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    IdempotencyKey.objects.filter(
+        key=key, created_at__lt=expired_before
+    ).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                key=key, request_hash=request_hash
+            ), True
+    except IntegrityError:
+        pass
+
+    reclaimed = IdempotencyKey.objects.filter(
+        key=key,
+        request_hash=request_hash,
+        response_status__isnull=True,
+        created_at__lt=now - CLAIM_LEASE,
+    ).update(created_at=now)
+    record = IdempotencyKey.objects.filter(key=key).first()
+    return record, bool(reclaimed)
+
+
+def idempotent(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view(request, *args, **kwargs)
+
+        request_hash = sha1(request.body).hexdigest()
+        record, claimed = claim_key(key, request_hash)
+        if not claimed:
+            if record and record.request_hash != request_hash:
+                return Response(
+                    {"detail": "Ключ уже использован для другого запроса"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record is None or record.response_status is None:
+                return Response(
+                    {"detail": "Запрос с этим ключом ещё обрабатывается"},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": str(RETRY_AFTER)},
+                )
+            return Response(
+                record.response_body, status=record.response_status
+            )
+
+        try:
+            with transaction.atomic():
+                response = view(request, *args, **kwargs)
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(
+                    update_fields=["response_status", "response_body"]
+                )
+        except Exception:
+            record.delete()
+            raise
+        return response
+
+    return wrapper
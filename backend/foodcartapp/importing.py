@@ -0,0 +1,89 @@
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.serializers import ValidationError
+
+from location.geocoding import assign_zones, enqueue_geocoding
+
+from .models import Order, OrderItem, Product
+from .serializers import OrderItemSerializer, OrderSerializer
+
+
+def parse_lines(numbered_lines):
+    parsed, errors = [], []
+    for line_number, line in numbered_lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            errors.append({"line": line_number, "errors": str(error)})
+            continue
+        if not isinstance(data, dict):
+            errors.append({"line": line_number, "errors": "Ожидался объект"})
+            continue
+        parsed.append((line_number, data))
+    return parsed, errors
+
+
+def get_product_ids(orders_data):
+    product_field = OrderItemSerializer().fields["product"]
+    product_ids = set()
+    for _, data in orders_data:
+        products = data.get("products")
+        if not isinstance(products, list):
+            continue
+        for order_item in products:
+            if not isinstance(order_item, dict):
+                continue
+            try:
+                product_ids.add(
+                    product_field.run_validation(order_item.get("product"))
+                )
+            except ValidationError:
+                continue
+    return product_ids
+
+
+def import_chunk(numbered_lines):
+    orders_data, errors = parse_lines(numbered_lines)
+    context = {
+        "products": Product.objects.in_bulk(get_product_ids(orders_data))
+    }
+
+    valid_orders = []
+    for line_number, data in orders_data:
+        serializer = OrderSerializer(data=data, context=context)
+        if serializer.is_valid():
+            valid_orders.append(serializer.validated_data)
+        else:
+            errors.append({"line": line_number, "errors": serializer.errors})
+
+    with transaction.atomic():
+        orders = Order.objects.bulk_create(
+            assign_zones(
+                OrderSerializer.build_order(data) for data in valid_orders
+            )
+        )
+        OrderItem.objects.bulk_create(
+            [
+                order_item
+                for order, data in zip(orders, valid_orders)
+                for order_item in OrderSerializer.build_order_items(
+                    order, data
+                )
+            ]
+        )
+        enqueue_geocoding(order.address for order in orders)
+    return len(orders), sorted(errors, key=lambda error: error["line"])
+
+
+def import_orders(lines, chunk_size=1000):
+    numbered_lines = enumerate(lines, start=1)
+    imported, errors = 0, []
+    while chunk := list(islice(numbered_lines, chunk_size)):
+        chunk_imported, chunk_errors = import_chunk(chunk)
+        imported += chunk_imported
+        errors.extend(chunk_errors)
+    return {"imported": imported, "errors": errors}
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет сохранённую стоимость заказов с суммой по их позициям"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Пересчитать стоимость расходящихся заказов",
+        )
+
+    def handle(self, *args, **options):
+        drifted_ids = list(
+            Order.objects.fetch_with_total_amounts()
+            .exclude(total=Coalesce("order_amount", Value(0)))
+            .values_list("id", flat=True)
+        )
+        if not drifted_ids:
+            self.stdout.write(self.style.SUCCESS("Расхождений нет"))
+            return
+
+        self.stdout.write(
+            f"Стоимость расходится у заказов: "
+            f"{', '.join(map(str, drifted_ids))}"
+        )
+        if options["fix"]:
+            Order.objects.filter(id__in=drifted_ids).update_totals()
+            self.stdout.write(
+                self.style.SUCCESS(f"Пересчитано заказов: {len(drifted_ids)}")
+            )
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.importing import import_orders
+
+
+class Command(BaseCommand):
+    help = "Импортирует заказы из файла в формате JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Путь к файлу с заказами или - для stdin"
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            result = import_orders(sys.stdin, options["chunk_size"])
+        else:
+            with open(options["path"], encoding="utf-8") as file:
+                result = import_orders(file, options["chunk_size"])
+
+        for error in result["errors"]:
+            self.stderr.write(f"Строка {error['line']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано заказов: {result['imported']}, "
+                f"с ошибками: {len(result['errors'])}"
+            )
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from foodcartapp.candidates import refresh_candidates
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рестораны для заказов, отмеченных как устаревшие"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать накопившуюся очередь и завершиться",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                refreshed = self.refresh_batch(options["batch_size"])
+            except DatabaseError as error:
+                if options["once"]:
+                    raise
+                self.stderr.write(f"Не удалось пересчитать заказы: {error}")
+                refreshed = 0
+            if refreshed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+    def refresh_batch(self, batch_size):
+        with transaction.atomic():
+            order_ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(candidates_outdated=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if order_ids:
+                refresh_candidates(order_ids)
+                Order.objects.filter(id__in=order_ids).update(
+                    candidates_outdated=False, updated_at=timezone.now()
+                )
+        return len(order_ids)
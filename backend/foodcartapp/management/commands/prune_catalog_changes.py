@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodcartapp.models import CatalogChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет старые записи журнала изменений каталога. Клиенты, "
+        "отставшие дальше удалённых записей, получат 410 и загрузят "
+        "каталог целиком"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Сколько дней хранить изменения",
+        )
+
+    def handle(self, *args, **options):
+        last_change = CatalogChange.objects.order_by("-id").first()
+        if not last_change:
+            self.stdout.write("Журнал пуст")
+            return
+
+        expired_before = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = (
+            CatalogChange.objects.filter(created_at__lt=expired_before)
+            .exclude(id=last_change.id)
+            .delete()
+        )
+        self.stdout.write(f"Удалено записей: {deleted}")
@@ -0,0 +1,43 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.candidates import refresh_candidates
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рестораны, которые могут приготовить заказы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать и выполненные, и отменённые заказы",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько заказов пересчитывать за раз",
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if not options["all"]:
+            orders = orders.active()
+        order_ids = iter(
+            list(orders.order_by("id").values_list("id", flat=True))
+        )
+
+        rebuilt_orders = rebuilt_candidates = 0
+        while chunk := list(islice(order_ids, options["chunk_size"])):
+            rebuilt_candidates += refresh_candidates(chunk)
+            rebuilt_orders += len(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пересчитано заказов: {rebuilt_orders}, "
+                f"ресторанов для них: {rebuilt_candidates}"
+            )
+        )
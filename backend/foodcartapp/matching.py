@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from .models import OrderItem, RestaurantMenuItem
+
+
+class RestaurantMatcher:
+    def __init__(self, menu_items):
+        self.restaurant_ids = []
+        self._restaurant_bits = {}
+        self._product_masks = defaultdict(int)
+        for restaurant_id, product_id in menu_items:
+            bit = self._restaurant_bits.get(restaurant_id)
+            if bit is None:
+                bit = len(self.restaurant_ids)
+                self._restaurant_bits[restaurant_id] = bit
+                self.restaurant_ids.append(restaurant_id)
+            self._product_masks[product_id] |= 1 << bit
+
+    @classmethod
+    def from_db(cls, restaurants=None):
+        menu_items = RestaurantMenuItem.objects.filter(availability=True)
+        if restaurants is not None:
+            menu_items = menu_items.filter(restaurant__in=restaurants)
+        return cls(
+            menu_items.values_list("restaurant_id", "product_id").iterator()
+        )
+
+    def get_mask(self, product_ids):
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        mask = -1
+        for product_id in product_ids:
+            mask &= self._product_masks.get(product_id, 0)
+            if not mask:
+                break
+        return mask
+
+    def find_restaurants(self, product_ids):
+        mask = self.get_mask(product_ids)
+        restaurant_ids = []
+        while mask:
+            lowest_bit = mask & -mask
+            restaurant_ids.append(
+                self.restaurant_ids[lowest_bit.bit_length() - 1]
+            )
+            mask ^= lowest_bit
+        return restaurant_ids
+
+
+def find_restaurants_for_orders(orders, matcher=None):
+    if matcher is None:
+        matcher = RestaurantMatcher.from_db()
+
+    order_products = defaultdict(set)
+    order_items = OrderItem.objects.filter(order__in=orders).values_list(
+        "order_id", "product_id"
+    )
+    for order_id, product_id in order_items.iterator():
+        order_products[order_id].add(product_id)
+
+    return {
+        order_id: matcher.find_restaurants(product_ids)
+        for order_id, product_ids in order_products.items()
+    }
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0049_alter_order_created_at_alter_order_payment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Товар'), ('category', 'Категория'), ('menu_item', 'Пункт меню ресторана')], max_length=20, verbose_name='Что изменилось')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата/время изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение каталога',
+                'verbose_name_plural': 'Журнал изменений каталога',
+            },
+        ),
+    ]
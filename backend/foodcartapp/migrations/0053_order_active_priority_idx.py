@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0052_order_total'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(models.Case(models.When(status='accepted', then=models.Value(0)), models.When(status='prepared', then=models.Value(1)), models.When(status='delivering', then=models.Value(2)), default=models.Value(3), output_field=models.IntegerField()), models.F('created_at'), models.F('id'), condition=models.Q(('status__in', ['accepted', 'prepared', 'delivering'])), name='order_active_priority_idx'),
+        ),
+    ]
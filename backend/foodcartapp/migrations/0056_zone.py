@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0005_deliveryzone'),
+        ('foodcartapp', '0055_ordercandidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='zone',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='location.deliveryzone', verbose_name='зона доставки'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='zone',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='restaurants', to='location.deliveryzone', verbose_name='зона доставки'),
+        ),
+    ]
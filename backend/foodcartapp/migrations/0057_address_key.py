@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+from location.tools import get_address_key
+
+
+def fill_address_keys(apps, schema_editor):
+    for model_name in ['Restaurant', 'Order']:
+        model = apps.get_model('foodcartapp', model_name)
+        objects = []
+        for obj in model.objects.only('id', 'address').iterator():
+            obj.address_key = get_address_key(obj.address)
+            objects.append(obj)
+            if len(objects) == 1000:
+                model.objects.bulk_update(objects, ['address_key'])
+                objects = []
+        model.objects.bulk_update(objects, ['address_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0056_zone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='address_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=40, verbose_name='Ключ адреса'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='address_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=40, verbose_name='ключ адреса'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_address_keys, migrations.RunPython.noop),
+    ]
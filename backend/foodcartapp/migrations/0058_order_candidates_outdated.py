@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0057_address_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='candidates_outdated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Рестораны нужно пересчитать'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='candidates_outdated',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Рестораны нужно пересчитать'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(models.F('id'), condition=models.Q(('candidates_outdated', True)), name='order_candidates_outdated_idx'),
+        ),
+    ]
@@ -1,15 +1,27 @@
-import requests
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import F, Sum
-from django.db.models.signals import post_save
+from django.db.models import (
+    Case,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
-from location.models import Location
-from restaurateur.tools import fetch_coordinates
-from star_burger.settings import YAGEO_API_KEY
+from location.geocoding import assign_zones, enqueue_geocoding
+from location.models import DeliveryZone
+from location.tools import get_address_key
 
 
 class Restaurant(models.Model):
@@ -24,6 +36,18 @@ class Restaurant(models.Model):
         max_length=50,
         blank=True,
     )
+    address_key = models.CharField(
+        "ключ адреса", max_length=40, db_index=True, editable=False
+    )
+    zone = models.ForeignKey(
+        DeliveryZone,
+        related_name="restaurants",
+        verbose_name="зона доставки",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "ресторан"
@@ -32,29 +56,15 @@ class Restaurant(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.address_key = get_address_key(self.address)
+        assign_zones([self])
+        super().save(*args, **kwargs)
+
 
 @receiver(post_save, sender=Restaurant)
 def fetch_restaurant_coords(sender, instance, created, **kwargs):
-    try:
-        address = instance.address
-        Location.objects.get(address=address)
-    except Location.DoesNotExist:
-        try:
-            latitude, longitude = fetch_coordinates(
-                YAGEO_API_KEY, address
-            )
-
-            Location.objects.update_or_create(
-                address=address,
-                latitude=latitude,
-                longitude=longitude,
-                defaults={"updated_at": timezone.now},
-            )
-        except requests.exceptions.HTTPError:
-            Location.objects.create(
-                address=address,
-                defaults={"updated_at": timezone.now},
-            )
+    enqueue_geocoding([instance.address])
 
 
 class ProductQuerySet(models.QuerySet):
@@ -140,7 +150,71 @@ class RestaurantMenuItem(models.Model):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+ACTIVE_ORDER_STATUSES = ["accepted", "prepared", "delivering"]
+ORDER_STATUS_PRIORITY = Case(
+    *[
+        When(status=status, then=Value(priority))
+        for priority, status in enumerate(ACTIVE_ORDER_STATUSES)
+    ],
+    default=Value(len(ACTIVE_ORDER_STATUSES)),
+    output_field=models.IntegerField(),
+)
+
+
+ORDER_TRANSITIONS = {
+    "accepted": ["prepared", "canceled"],
+    "prepared": ["delivering", "canceled"],
+    "delivering": ["completed", "canceled"],
+}
+
+
 class OrderQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status__in=ACTIVE_ORDER_STATUSES)
+
+    def by_priority(self):
+        return self.annotate(status_priority=ORDER_STATUS_PRIORITY).order_by(
+            "status_priority", "created_at", "id"
+        )
+
+    def after(self, status_priority, created_at, order_id):
+        return self.filter(
+            Q(status_priority__gt=status_priority)
+            | Q(status_priority=status_priority, created_at__gt=created_at)
+            | Q(
+                status_priority=status_priority,
+                created_at=created_at,
+                id__gt=order_id,
+            )
+        )
+
+    def transition(self, status, restaurant=None):
+        now = timezone.now()
+        orders = self.filter(
+            status__in=[
+                source
+                for source, targets in ORDER_TRANSITIONS.items()
+                if status in targets
+            ]
+        )
+        changes = {"status": status, "updated_at": now}
+        if status == "prepared":
+            changes["called_at"] = Coalesce("called_at", Value(now))
+        if status == "completed":
+            changes["delivered_at"] = Coalesce("delivered_at", Value(now))
+        if restaurant is not None:
+            orders = orders.filter(candidates__restaurant=restaurant)
+            changes["restaurant"] = restaurant
+        elif status == "prepared":
+            orders = orders.filter(restaurant__isnull=False)
+        return orders.update(**changes)
+
+    def changed_since(self, updated_at, order_id):
+        return self.filter(
+            Q(updated_at__gt=updated_at)
+            | Q(updated_at=updated_at, id__gt=order_id)
+        ).order_by("updated_at", "id")
+
     def fetch_with_total_amounts(self):
         return self.annotate(
             order_amount=Sum(
@@ -148,6 +222,22 @@ class OrderQuerySet(models.QuerySet):
             )
         )
 
+    def update_totals(self):
+        totals = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .values("order")
+            .annotate(total=Sum(F("price") * F("quantity")))
+            .values("total")
+        )
+        return self.update(
+            total=Coalesce(
+                Subquery(totals),
+                Value(Decimal(0)),
+                output_field=models.DecimalField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
 
 class Order(models.Model):
     STATUSES = [
@@ -193,20 +283,64 @@ class Order(models.Model):
         "Дата/время звонка", null=True, blank=True, db_index=True
     )
     address = models.TextField("Адрес доставки", max_length=200)
+    address_key = models.CharField(
+        "Ключ адреса", max_length=40, db_index=True, editable=False
+    )
     delivered_at = models.DateTimeField(
         "Дата/время доставки", null=True, blank=True, db_index=True
     )
     comment = models.TextField("Комментарий", blank=True)
+    total = models.DecimalField(
+        "Стоимость заказа",
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        "Дата/время изменения", auto_now=True, db_index=True
+    )
+    zone = models.ForeignKey(
+        DeliveryZone,
+        related_name="orders",
+        verbose_name="зона доставки",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    candidates_outdated = models.BooleanField(
+        "Рестораны нужно пересчитать", default=True, editable=False
+    )
 
     objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
+        indexes = [
+            models.Index(
+                ORDER_STATUS_PRIORITY,
+                "created_at",
+                "id",
+                name="order_active_priority_idx",
+                condition=Q(status__in=ACTIVE_ORDER_STATUSES),
+            ),
+            models.Index(
+                "id",
+                name="order_candidates_outdated_idx",
+                condition=Q(candidates_outdated=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.firstname} {self.lastname} {self.address}"
 
+    def save(self, *args, **kwargs):
+        self.address_key = get_address_key(self.address)
+        assign_zones([self])
+        super().save(*args, **kwargs)
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
@@ -235,4 +369,78 @@ class OrderItem(models.Model):
         verbose_name_plural = "Состав заказа"
 
     def __str__(self):
-        return f"Заказ {self.order.id} - {self.product.name} - {self.quantity}"
+        return f"Заказ {self.order_id} - {self.product.name} - {self.quantity}"
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_total(sender, instance, origin=None, **kwargs):
+    # OrderItem bulk deletions recompute totals, see OrderAdmin.save_formset
+    if isinstance(origin, models.QuerySet) and origin.model is OrderItem:
+        return
+    Order.objects.filter(pk=instance.order_id).update_totals()
+
+
+class OrderCandidate(models.Model):
+    order = models.ForeignKey(
+        Order,
+        related_name="candidates",
+        verbose_name="заказ",
+        on_delete=models.CASCADE,
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name="order_candidates",
+        verbose_name="ресторан",
+        on_delete=models.CASCADE,
+    )
+    distance = models.FloatField("расстояние, км", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "ресторан для заказа"
+        verbose_name_plural = "рестораны для заказов"
+        unique_together = [["order", "restaurant"]]
+
+    def __str__(self):
+        return f"Заказ {self.order_id} - {self.restaurant_id}"
+
+
+class CatalogChange(models.Model):
+    KINDS = [
+        ("product", "Товар"),
+        ("category", "Категория"),
+        ("menu_item", "Пункт меню ресторана"),
+    ]
+    kind = models.CharField("Что изменилось", max_length=20, choices=KINDS)
+    object_id = models.PositiveIntegerField("ID объекта")
+    created_at = models.DateTimeField(
+        "Дата/время изменения", auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = "Изменение каталога"
+        verbose_name_plural = "Журнал изменений каталога"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField("Ключ", max_length=255, unique=True)
+    request_hash = models.CharField("Хэш запроса", max_length=40)
+    response_status = models.PositiveSmallIntegerField(
+        "Код ответа", null=True, blank=True
+    )
+    response_body = models.JSONField(
+        "Тело ответа", null=True, blank=True, encoder=DjangoJSONEncoder
+    )
+    created_at = models.DateTimeField(
+        "Дата/время запроса", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+
+    def __str__(self):
+        return self.key
@@ -1,16 +1,19 @@
-import requests
 from django.db import transaction
-from django.utils import timezone
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    IntegerField,
+    ModelSerializer,
+    ValidationError,
+)
 
-from location.models import Location
-from restaurateur.tools import fetch_coordinates
-from star_burger.settings import YAGEO_API_KEY
+from location.geocoding import enqueue_geocoding
+from location.tools import get_address_key
 
-from .models import Order, OrderItem
+from .models import Order, OrderItem, Product
 
 
 class OrderItemSerializer(ModelSerializer):
+    product = IntegerField(min_value=1)
+
     class Meta:
         model = OrderItem
         fields = ["product", "quantity"]
@@ -32,45 +35,66 @@ class OrderSerializer(ModelSerializer):
             "products",
         ]
 
-    @transaction.atomic
-    def create(self, validated_data):
-        address = validated_data["address"]
-        order = Order.objects.create(
+    def validate_products(self, order_items):
+        product_ids = {order_item["product"] for order_item in order_items}
+        products = self.context.get("products", {})
+        missing_ids = product_ids - products.keys()
+        if missing_ids:
+            products = {**products, **Product.objects.in_bulk(missing_ids)}
+        unknown_ids = sorted(product_ids - products.keys())
+        if unknown_ids:
+            raise ValidationError(
+                "Недопустимые первичные ключи продуктов: "
+                + ", ".join(map(str, unknown_ids))
+            )
+
+        for order_item in order_items:
+            product = products[order_item["product"]]
+            order_item["product"] = product
+            order_item["price"] = product.price
+
+        total_field = Order._meta.get_field("total")
+        max_total = 10 ** (total_field.max_digits - total_field.decimal_places)
+        if self.get_total(order_items) >= max_total:
+            raise ValidationError("Слишком большая сумма заказа")
+        return order_items
+
+    @staticmethod
+    def get_total(order_items):
+        return sum(
+            order_item["price"] * order_item["quantity"]
+            for order_item in order_items
+        )
+
+    @staticmethod
+    def build_order(validated_data):
+        return Order(
             firstname=validated_data["firstname"],
             lastname=validated_data["lastname"],
             phonenumber=validated_data["phonenumber"],
-            address=address,
+            address=validated_data["address"],
+            address_key=get_address_key(validated_data["address"]),
+            total=OrderSerializer.get_total(validated_data["products"]),
         )
 
-        try:
-            Location.objects.get(address=address)
-        except Location.DoesNotExist:
-            try:
-                latitude, longitude = fetch_coordinates(
-                    YAGEO_API_KEY, address
-                )
-
-                Location.objects.update_or_create(
-                    address=address,
-                    latitude=latitude,
-                    longitude=longitude,
-                    defaults={"updated_at": timezone.now},
-                )
-            except requests.exceptions.HTTPError:
-                Location.objects.create(
-                    address=address,
-                    defaults={"updated_at": timezone.now},
-                )
-
-        order_items = []
-        for order_item in validated_data["products"]:
-            order_items.append(
-                OrderItem(
-                    order=order,
-                    product=order_item["product"],
-                    quantity=order_item["quantity"],
-                    price=order_item["product"].price,
-                )
+    @staticmethod
+    def build_order_items(order, validated_data):
+        return [
+            OrderItem(
+                order=order,
+                product=order_item["product"],
+                quantity=order_item["quantity"],
+                price=order_item["price"],
             )
-        OrderItem.objects.bulk_create(order_items)
+            for order_item in validated_data["products"]
+        ]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        order = self.build_order(validated_data)
+        order.save()
+        enqueue_geocoding([order.address])
+        OrderItem.objects.bulk_create(
+            self.build_order_items(order, validated_data)
+        )
         return order
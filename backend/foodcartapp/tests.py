@@ -0,0 +1,370 @@
+import json
+import random
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from hashlib import sha1
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .catalog import CATALOG_SETTLE_WINDOW
+from .idempotency import CLAIM_LEASE
+from .matching import RestaurantMatcher
+from .models import (
+    CatalogChange,
+    IdempotencyKey,
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+
+class RestaurantMatcherTest(SimpleTestCase):
+    def test_finds_restaurants_with_every_product(self):
+        matcher = RestaurantMatcher(
+            [(1, 10), (1, 11), (2, 10), (3, 11), (3, 10), (3, 12)]
+        )
+
+        self.assertCountEqual(matcher.find_restaurants([10]), [1, 2, 3])
+        self.assertCountEqual(matcher.find_restaurants([10, 11]), [1, 3])
+        self.assertEqual(matcher.find_restaurants([10, 12, 12]), [3])
+
+    def test_unknown_or_missing_products(self):
+        matcher = RestaurantMatcher([(1, 10), (2, 11)])
+
+        self.assertEqual(matcher.find_restaurants([10, 11]), [])
+        self.assertEqual(matcher.find_restaurants([99]), [])
+        self.assertEqual(matcher.find_restaurants([]), [])
+
+    def test_matches_set_intersection(self):
+        rng = random.Random(42)
+        menus = {
+            restaurant_id: set(rng.sample(range(30), rng.randint(0, 20)))
+            for restaurant_id in range(200)
+        }
+        matcher = RestaurantMatcher(
+            (restaurant_id, product_id)
+            for restaurant_id, product_ids in menus.items()
+            for product_id in product_ids
+        )
+
+        for _ in range(100):
+            product_ids = rng.sample(range(32), rng.randint(1, 4))
+            expected = [
+                restaurant_id
+                for restaurant_id, menu in menus.items()
+                if menu.issuperset(product_ids)
+            ]
+            self.assertCountEqual(
+                matcher.find_restaurants(product_ids), expected
+            )
+
+
+class IdempotentOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name="Чизбургер", price=100, image="cheeseburger.png"
+        )
+
+    def setUp(self):
+        self.body = json.dumps(
+            {
+                "products": [{"product": self.product.id, "quantity": 2}],
+                "firstname": "Иван",
+                "lastname": "Петров",
+                "phonenumber": "+79161234567",
+                "address": "Москва, Тверская 1",
+            }
+        )
+
+    def post(self, body, key="order-1"):
+        return self.client.post(
+            "/api/order/",
+            body,
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def claim(self, key="order-1"):
+        return IdempotencyKey.objects.create(
+            key=key, request_hash=sha1(self.body.encode()).hexdigest()
+        )
+
+    def test_replays_stored_response(self):
+        first = self.post(self.body)
+        second = self.post(self.body)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_rejects_key_reused_for_other_request(self):
+        self.post(self.body)
+        other_body = json.loads(self.body)
+        other_body["firstname"] = "Пётр"
+
+        response = self.post(json.dumps(other_body))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_conflicts_with_request_in_progress(self):
+        self.claim()
+
+        response = self.post(self.body)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_reclaims_stale_claim(self):
+        record = self.claim()
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            created_at=timezone.now() - CLAIM_LEASE - timedelta(seconds=1)
+        )
+
+        response = self.post(self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.response_body["id"], response.json()["id"])
+
+    def test_releases_key_after_invalid_request(self):
+        response = self.post(json.dumps({"products": []}))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class OrderAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="admin")
+        cls.burger, cls.fries, cls.cola = Product.objects.bulk_create(
+            [
+                Product(name="Бургер", price=100, image="burger.png"),
+                Product(name="Картофель", price=50, image="fries.png"),
+                Product(name="Кола", price=70, image="cola.png"),
+            ]
+        )
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79161234567",
+            address="Москва, Тверская 1",
+        )
+        self.burger_item = OrderItem.objects.create(
+            order=self.order, product=self.burger, quantity=2, price=100
+        )
+        self.fries_item = OrderItem.objects.create(
+            order=self.order, product=self.fries, quantity=1, price=50
+        )
+        Order.objects.filter(pk=self.order.pk).update(
+            candidates_outdated=False
+        )
+
+    def test_save_formset_updates_total(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("250"))
+
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            f"/admin/foodcartapp/order/{self.order.pk}/change/",
+            {
+                "status": "accepted",
+                "payment": "cash",
+                "firstname": "Иван",
+                "lastname": "Петров",
+                "phonenumber": "+79161234567",
+                "address": "Москва, Тверская 1",
+                "comment": "",
+                "restaurant": "",
+                "order_items-TOTAL_FORMS": "3",
+                "order_items-INITIAL_FORMS": "2",
+                "order_items-MIN_NUM_FORMS": "0",
+                "order_items-MAX_NUM_FORMS": "1000",
+                "order_items-0-id": self.burger_item.pk,
+                "order_items-0-order": self.order.pk,
+                "order_items-0-product": self.burger.pk,
+                "order_items-0-quantity": "3",
+                "order_items-0-price": "1",
+                "order_items-1-id": self.fries_item.pk,
+                "order_items-1-order": self.order.pk,
+                "order_items-1-product": self.fries.pk,
+                "order_items-1-quantity": "1",
+                "order_items-1-price": "50",
+                "order_items-1-DELETE": "on",
+                "order_items-2-order": self.order.pk,
+                "order_items-2-product": self.cola.pk,
+                "order_items-2-quantity": "1",
+                "order_items-2-price": "1",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("370"))
+        self.assertTrue(self.order.candidates_outdated)
+        self.assertCountEqual(
+            self.order.order_items.values_list(
+                "product_id", "quantity", "price"
+            ),
+            [
+                (self.burger.pk, 3, Decimal("100")),
+                (self.cola.pk, 1, Decimal("70")),
+            ],
+        )
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(
+            name="Бургерная", address="Москва, Тверская 1"
+        )
+
+    def add_product(self, name):
+        product = Product.objects.create(
+            name=name, price=100, image=f"{name}.png"
+        )
+        RestaurantMenuItem.objects.create(
+            restaurant=self.restaurant, product=product
+        )
+        return product
+
+    def test_commit_of_earlier_change_replaces_cached_catalog(self):
+        with self.captureOnCommitCallbacks() as earlier_callbacks:
+            earlier_product = self.add_product("Бургер")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_product("Картофель")
+        response = self.client.get("/api/products/")
+        etag = response["ETag"]
+
+        # The earlier transaction becomes visible only when it commits
+        Product.objects.filter(pk=earlier_product.pk).update(name="Чизбургер")
+        for callback in earlier_callbacks:
+            callback()
+
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(
+            "Чизбургер", [product["name"] for product in response.json()]
+        )
+
+    def test_commits_within_a_second_change_last_modified(self):
+        response = self.client.get("/api/products/")
+        last_modified = response["Last-Modified"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_product("Бургер")
+
+        response = self.client.get(
+            "/api/products/", HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["Last-Modified"], last_modified)
+
+    def test_delta_etag_changes_when_changes_settle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_product("Бургер")
+        response = self.client.get("/api/products/", {"since": 0})
+        self.assertEqual(response.json()["version"], 0)
+
+        CatalogChange.objects.update(
+            created_at=timezone.now() - CATALOG_SETTLE_WINDOW
+        )
+        response = self.client.get(
+            "/api/products/",
+            {"since": 0},
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["version"], CatalogChange.objects.latest("id").id
+        )
+
+
+class ImportOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            "staff", password="staff", is_staff=True
+        )
+        cls.burger, cls.fries = Product.objects.bulk_create(
+            [
+                Product(name="Бургер", price=100, image="burger.png"),
+                Product(name="Картофель", price=50, image="fries.png"),
+            ]
+        )
+
+    def make_line(self, **products):
+        return json.dumps(
+            {
+                "products": [
+                    {"product": product_id, "quantity": 1}
+                    for product_id in products.values()
+                ],
+                "firstname": "Иван",
+                "lastname": "Петров",
+                "phonenumber": "+79161234567",
+                "address": "Москва, Тверская 1",
+            }
+        )
+
+    def test_endpoint_imports_valid_lines_and_reports_errors(self):
+        lines = [
+            self.make_line(burger=self.burger.id),
+            self.make_line(burger=str(self.burger.id), fries=self.fries.id),
+            "не json",
+            self.make_line(unknown=self.fries.id + 100),
+        ]
+        self.client.force_login(self.staff)
+
+        response = self.client.post(
+            "/api/orders/import/",
+            "\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["imported"], 2)
+        self.assertEqual(
+            [error["line"] for error in response.json()["errors"]], [3, 4]
+        )
+        self.assertCountEqual(
+            Order.objects.values_list("total", flat=True),
+            [Decimal("100"), Decimal("150")],
+        )
+
+    def test_endpoint_requires_staff(self):
+        response = self.client.post(
+            "/api/orders/import/",
+            self.make_line(burger=self.burger.id),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Order.objects.exists())
+
+    def test_command_accepts_product_ids_as_strings(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as file:
+            file.write(self.make_line(burger=str(self.burger.id)))
+            file.flush()
+            call_command("import_orders", file.name, stdout=StringIO())
+
+        order = Order.objects.get()
+        self.assertEqual(order.total, Decimal("100"))
+        self.assertTrue(order.candidates_outdated)
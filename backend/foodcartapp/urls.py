@@ -1,6 +1,13 @@
 from django.urls import path
 
-from .views import product_list_api, banners_list_api, register_order
+from .views import (
+    banners_list_api,
+    import_orders_api,
+    product_list_api,
+    register_order,
+    restaurant_menu_api,
+    restaurants_menu_api,
+)
 
 
 app_name = "foodcartapp"
@@ -9,4 +16,7 @@ urlpatterns = [
     path('products/', product_list_api),
     path('banners/', banners_list_api),
     path('order/', register_order),
+    path('orders/import/', import_orders_api),
+    path('restaurants/menu/', restaurants_menu_api),
+    path('restaurants/<int:restaurant_id>/menu/', restaurant_menu_api),
 ]
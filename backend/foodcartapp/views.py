@@ -1,78 +1,137 @@
-from django.http import JsonResponse
+import functools
+import json
+import re
+from hashlib import sha1
+
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseGone,
+    JsonResponse,
+)
 from django.templatetags.static import static
-from rest_framework.decorators import api_view
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from .models import Product
+from .catalog import (
+    build_catalog_delta,
+    encode_payload,
+    get_catalog_etag,
+    get_catalog_last_modified,
+    get_catalog_payload,
+    get_menus,
+    is_pruned_version,
+)
+from .idempotency import idempotent
+from .importing import import_orders
 from .serializers import OrderSerializer
 
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
-def banners_list_api(request):
+
+@functools.cache
+def get_banners_payload():
     # FIXME move data to db?
-    return JsonResponse(
-        [
-            {
-                "title": "Burger",
-                "src": static("burger.jpg"),
-                "text": "Tasty Burger at your door step",
-            },
-            {
-                "title": "Spices",
-                "src": static("food.jpg"),
-                "text": "All Cuisines",
-            },
-            {
-                "title": "New York",
-                "src": static("tasty.jpg"),
-                "text": "Food is incomplete without a tasty dessert",
-            },
-        ],
-        safe=False,
-        json_dumps_params={
-            "ensure_ascii": False,
-            "indent": 4,
+    banners = [
+        {
+            "title": "Burger",
+            "src": static("burger.jpg"),
+            "text": "Tasty Burger at your door step",
         },
-    )
+        {
+            "title": "Spices",
+            "src": static("food.jpg"),
+            "text": "All Cuisines",
+        },
+        {
+            "title": "New York",
+            "src": static("tasty.jpg"),
+            "text": "Food is incomplete without a tasty dessert",
+        },
+    ]
+    return json.dumps(banners, ensure_ascii=False).encode()
+
+
+def get_banners_etag(request):
+    return f'"banners-{sha1(get_banners_payload()).hexdigest()}"'
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=get_banners_etag)
+def banners_list_api(request):
+    return HttpResponse(get_banners_payload(), content_type="application/json")
+
+
+@cache_control(no_cache=True)
+@condition(
+    etag_func=get_catalog_etag,
+    last_modified_func=get_catalog_last_modified,
+)
 def product_list_api(request):
-    products = Product.objects.select_related("category").available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            "id": product.id,
-            "name": product.name,
-            "price": product.price,
-            "special_status": product.special_status,
-            "description": product.description,
-            "category": {
-                "id": product.category.id,
-                "name": product.category.name,
-            }
-            if product.category
-            else None,
-            "image": product.image.url,
-            "restaurant": {
-                "id": product.id,
-                "name": product.name,
-            },
-        }
-        dumped_products.append(dumped_product)
+    since = request.GET.get("since")
+    if since is None:
+        payload = get_catalog_payload()
+    elif since.isdigit():
+        if is_pruned_version(int(since)):
+            return HttpResponseGone(
+                "Версия устарела, загрузите каталог целиком"
+            )
+        payload = encode_payload(build_catalog_delta(int(since)))
+    else:
+        return HttpResponseBadRequest("since должен быть номером версии")
+
+    if ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+        response = HttpResponse(
+            payload["gzip"], content_type="application/json"
+        )
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(
+            payload["body"], content_type="application/json"
+        )
+    if "version" in payload:
+        response["X-Catalog-Version"] = payload["version"]
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def restaurant_menu_api(request, restaurant_id):
+    menu = get_menus([restaurant_id]).get(restaurant_id)
+    if menu is None:
+        raise Http404("Ресторан не найден")
+    return JsonResponse(menu, json_dumps_params={"ensure_ascii": False})
+
+
+def restaurants_menu_api(request):
+    ids = request.GET.get("ids", "").split(",")
+    if not all(restaurant_id.isdigit() for restaurant_id in ids):
+        return HttpResponseBadRequest(
+            "ids должен быть списком ID ресторанов через запятую"
+        )
+    menus = get_menus({int(restaurant_id) for restaurant_id in ids})
     return JsonResponse(
-        dumped_products,
-        safe=False,
-        json_dumps_params={
-            "ensure_ascii": False,
-            "indent": 4,
-        },
+        {str(restaurant_id): menu for restaurant_id, menu in menus.items()},
+        json_dumps_params={"ensure_ascii": False},
     )
 
 
 @api_view(["POST"])
+@idempotent
 def register_order(request):
     serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     serializer.save()
 
     return Response(serializer.data)
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def import_orders_api(request):
+    lines = iter(request.stream.readline, b"") if request.stream else []
+    return Response(import_orders(lines))
@@ -1,8 +1,25 @@
 from django.contrib import admin
 
-from .models import Location
+from foodcartapp.paginators import ApproximateCountPaginator
+
+from .models import DeliveryZone, GeocodingTask, Location
+
+
+@admin.register(DeliveryZone)
+class DeliveryZoneAdmin(admin.ModelAdmin):
+    list_display = ["name", "latitude", "longitude", "radius_km"]
 
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    pass
+    list_display = ["address", "latitude", "longitude", "zone"]
+    list_filter = ["zone"]
+    list_select_related = ["zone"]
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(GeocodingTask)
+class GeocodingTaskAdmin(admin.ModelAdmin):
+    list_display = ["address", "attempts", "next_attempt_at", "last_error"]
+    search_fields = ["address"]
@@ -0,0 +1,42 @@
+import numpy as np
+from geopy import distance
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def has_coordinates(coordinates):
+    return coordinates is not None and None not in coordinates
+
+
+def haversine_matrix(from_points, to_points):
+    from_points = np.radians(np.asarray(from_points, dtype=float))
+    to_points = np.radians(np.asarray(to_points, dtype=float))
+    from_points = from_points.reshape(-1, 2)
+    to_points = to_points.reshape(-1, 2)
+
+    from_lat = from_points[:, 0, np.newaxis]
+    from_lon = from_points[:, 1, np.newaxis]
+    to_lat = to_points[np.newaxis, :, 0]
+    to_lon = to_points[np.newaxis, :, 1]
+
+    half_chord = (
+        np.sin((to_lat - from_lat) / 2) ** 2
+        + np.cos(from_lat)
+        * np.cos(to_lat)
+        * np.sin((to_lon - from_lon) / 2) ** 2
+    )
+    return (
+        2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half_chord, 0, 1)))
+    )
+
+
+def refine_distances(origin, ranked, destinations, top_n):
+    if not top_n:
+        return ranked
+    top = [
+        (key, distance.distance(origin, destinations[key]).km)
+        for key, _ in ranked[:top_n]
+    ]
+    top.sort(key=lambda item: item[1])
+    return top + ranked[top_n:]
+
@@ -0,0 +1,177 @@
+import functools
+import json
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from restaurateur.tools import fetch_coordinates
+
+from .tools import get_address_key
+
+
+class GeocoderError(Exception):
+    pass
+
+
+class GeocoderUnavailable(GeocoderError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    def __init__(self, ratio, max_tokens):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class BaseGeocoder:
+    def geocode(self, address):
+        raise NotImplementedError
+
+
+class YandexGeocoder(BaseGeocoder):
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        api_key=None,
+        timeout=3,
+        deadline=5,
+        pool_size=10,
+        retry_ratio=0.1,
+        max_retry_tokens=10,
+        retry_backoff=0.2,
+        failure_threshold=5,
+        reset_timeout=30,
+    ):
+        self.api_key = api_key or settings.YAGEO_API_KEY
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retry_backoff = retry_backoff
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=pool_size),
+        )
+        self.retry_budget = RetryBudget(retry_ratio, max_retry_tokens)
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold, reset_timeout
+        )
+
+    def is_retryable(self, error):
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response.status_code in self.retry_statuses
+        return isinstance(
+            error,
+            (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        )
+
+    def geocode(self, address):
+        if not self.circuit_breaker.allow_request():
+            raise GeocoderUnavailable("Геокодер временно недоступен")
+
+        self.retry_budget.record_request()
+        deadline = time.monotonic() + self.deadline
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                latitude, longitude = fetch_coordinates(
+                    self.api_key,
+                    address,
+                    session=self.session,
+                    timeout=min(self.timeout, max(remaining, 0.1)),
+                )
+                if latitude is not None:
+                    latitude, longitude = float(latitude), float(longitude)
+            except requests.exceptions.RequestException as error:
+                can_retry = (
+                    self.is_retryable(error)
+                    and time.monotonic() + self.retry_backoff < deadline
+                    and self.retry_budget.withdraw()
+                )
+                if can_retry:
+                    time.sleep(self.retry_backoff)
+                    continue
+                self.circuit_breaker.record_failure()
+                raise GeocoderError(str(error)) from error
+            except (KeyError, IndexError, TypeError, ValueError) as error:
+                self.circuit_breaker.record_failure()
+                raise GeocoderError(
+                    f"Неожиданный ответ геокодера: {error!r}"
+                ) from error
+
+            self.circuit_breaker.record_success()
+            if latitude is None:
+                return None, None
+            return latitude, longitude
+
+
+class FileGeocoder(BaseGeocoder):
+    def __init__(self, path, latency=0):
+        self.latency = latency
+        with open(path, encoding="utf-8") as file:
+            places = json.load(file)
+        self.places = {
+            get_address_key(address): coordinates
+            for address, coordinates in places.items()
+        }
+
+    def geocode(self, address):
+        if self.latency:
+            time.sleep(self.latency)
+        coordinates = self.places.get(get_address_key(address))
+        if not coordinates:
+            return None, None
+        latitude, longitude = coordinates
+        return float(latitude), float(longitude)
+
+
+@functools.cache
+def get_geocoder():
+    backend = import_string(settings.GEOCODER["BACKEND"])
+    return backend(**settings.GEOCODER.get("OPTIONS", {}))
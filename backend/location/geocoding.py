@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .geocoders import get_geocoder
+from .models import GeocodingTask, Location
+from .tools import get_address_key
+
+NOT_FOUND = (None, None)
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, coordinates, expires_at):
+        with self._lock:
+            self._entries[key] = (coordinates, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class GeocodingCache:
+    key_prefix = "geocoding"
+
+    def __init__(self, maxsize, ttl, negative_ttl, local_ttl):
+        self.local = LRUCache(maxsize)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local_ttl = local_ttl
+
+    def get_cache_key(self, address):
+        return f"{self.key_prefix}:{get_address_key(address)}"
+
+    def get_expiration(self, coordinates, updated_at):
+        if coordinates == NOT_FOUND:
+            return updated_at.timestamp() + self.negative_ttl
+        return updated_at.timestamp() + self.ttl
+
+    def get(self, address):
+        key = self.get_cache_key(address)
+        entry = self.local.get(key)
+        if entry is None:
+            entry = cache.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            self.set_local(key, *entry)
+        return entry[0]
+
+    def get_many(self, addresses):
+        found = {}
+        shared_keys = {}
+        for address in addresses:
+            key = self.get_cache_key(address)
+            entry = self.local.get(key)
+            if entry is None:
+                shared_keys[key] = address
+            else:
+                found[address] = entry[0]
+        if not shared_keys:
+            return found
+
+        now = time.time()
+        for key, entry in cache.get_many(shared_keys).items():
+            if entry[1] <= now:
+                continue
+            self.set_local(key, *entry)
+            found[shared_keys[key]] = entry[0]
+        return found
+
+    def set_local(self, key, coordinates, expires_at):
+        # Other processes update only the shared tier, so local entries
+        # are rechecked against it after a short while
+        self.local.set(
+            key, coordinates, min(expires_at, time.time() + self.local_ttl)
+        )
+
+    def set(self, address, coordinates, expires_at):
+        timeout = expires_at - time.time()
+        if timeout <= 0:
+            return
+        key = self.get_cache_key(address)
+        self.set_local(key, coordinates, expires_at)
+        cache.set(key, (coordinates, expires_at), timeout)
+
+    def delete(self, address):
+        key = self.get_cache_key(address)
+        self.local.delete(key)
+        cache.delete(key)
+
+
+geocoding_cache = GeocodingCache(
+    maxsize=settings.GEOCODER_CACHE_SIZE,
+    ttl=settings.GEOCODER_CACHE_TTL,
+    negative_ttl=settings.GEOCODER_NEGATIVE_CACHE_TTL,
+    local_ttl=settings.GEOCODER_LOCAL_CACHE_TTL,
+)
+
+
+def get_location_coordinates(location):
+    if location.latitude is None or location.longitude is None:
+        return NOT_FOUND
+    return location.latitude, location.longitude
+
+
+def find_location(address):
+    return Location.objects.filter(
+        address_key=get_address_key(address)
+    ).first()
+
+
+def assign_zones(objects):
+    objects = list(objects)
+    address_keys = {
+        obj.address: get_address_key(obj.address) for obj in objects
+    }
+    zones = dict(
+        Location.objects.filter(
+            address_key__in=set(address_keys.values())
+        ).values_list("address_key", "zone_id")
+    )
+    for obj in objects:
+        obj.zone_id = zones.get(address_keys[obj.address])
+    return objects
+
+
+def cache_location(location):
+    coordinates = get_location_coordinates(location)
+    if location.updated_at:
+        expires_at = geocoding_cache.get_expiration(
+            coordinates, location.updated_at
+        )
+        geocoding_cache.set(location.address, coordinates, expires_at)
+    return coordinates
+
+
+def is_fresh(location):
+    if not location.updated_at:
+        return False
+    expires_at = geocoding_cache.get_expiration(
+        get_location_coordinates(location), location.updated_at
+    )
+    return expires_at > time.time()
+
+
+def geocode_location(address, location=None):
+    latitude, longitude = get_geocoder().geocode(address)
+    if location is None:
+        location = Location(address=address)
+    location.latitude = latitude
+    location.longitude = longitude
+    location.updated_at = timezone.now()
+    location.save()
+    return location
+
+
+def ensure_location(address):
+    location = find_location(address)
+    if location is None or not is_fresh(location):
+        location = geocode_location(address, location)
+    return location
+
+
+def lookup_many_coordinates(addresses):
+    addresses = set(addresses)
+    coordinates = geocoding_cache.get_many(addresses)
+    missing_addresses = addresses - coordinates.keys()
+    if not missing_addresses:
+        return coordinates
+
+    address_keys = {
+        address: get_address_key(address) for address in missing_addresses
+    }
+    locations = {
+        location.address_key: location
+        for location in Location.objects.filter(
+            address_key__in=set(address_keys.values()),
+            updated_at__isnull=False,
+        )
+    }
+    for address, address_key in address_keys.items():
+        location = locations.get(address_key)
+        coordinates[address] = cache_location(location) if location else None
+    return coordinates
+
+
+def enqueue_geocoding(addresses):
+    tasks = {}
+    for address in addresses:
+        address_key = get_address_key(address)
+        if address_key in tasks or geocoding_cache.get(address) is not None:
+            continue
+        tasks[address_key] = GeocodingTask(
+            address=address, address_key=address_key
+        )
+    GeocodingTask.objects.bulk_create(
+        tasks.values(), ignore_conflicts=True
+    )
+
+
+@receiver(post_save, sender=Location)
+def update_cached_coordinates(sender, instance, **kwargs):
+    if not instance.updated_at:
+        geocoding_cache.delete(instance.address)
+        return
+    cache_location(instance)
+
+
+@receiver(post_delete, sender=Location)
+def delete_cached_coordinates(sender, instance, **kwargs):
+    geocoding_cache.delete(instance.address)
@@ -0,0 +1,58 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order, Restaurant
+from location.geocoding import assign_zones
+from location.models import DeliveryZone, Location, find_zone
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново распределяет адреса, рестораны и активные заказы "
+        "по зонам доставки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Распределить и выполненные, и отменённые заказы",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        zones = list(DeliveryZone.objects.all())
+        chunk_size = options["chunk_size"]
+
+        locations = Location.objects.filter(updated_at__isnull=False).only(
+            "id", "latitude", "longitude", "zone"
+        )
+        for chunk in self.iter_chunks(locations, chunk_size):
+            for location in chunk:
+                location.zone = find_zone(
+                    location.latitude, location.longitude, zones
+                )
+            Location.objects.bulk_update(chunk, ["zone"])
+
+        orders = Order.objects.all()
+        if not options["all"]:
+            orders = orders.active()
+        for queryset in [Restaurant.objects.all(), orders]:
+            queryset = queryset.only("id", "address", "zone")
+            for chunk in self.iter_chunks(queryset, chunk_size):
+                queryset.model.objects.bulk_update(
+                    assign_zones(chunk), ["zone"]
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Зоны доставки назначены. Пересчитайте рестораны для заказов "
+                "командой rebuild_order_candidates"
+            )
+        )
+
+    def iter_chunks(self, queryset, chunk_size):
+        objects = queryset.order_by("id").iterator(chunk_size=chunk_size)
+        while chunk := list(islice(objects, chunk_size)):
+            yield chunk
@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodcartapp.models import Order, Restaurant
+from location.geocoders import GeocoderError, get_geocoder
+from location.geocoding import cache_location, is_fresh
+from location.models import DeliveryZone, GeocodingTask, Location, find_zone
+from location.tools import get_address_key
+
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        time.sleep(slot - now)
+
+
+class Command(BaseCommand):
+    help = (
+        "Определяет координаты адресов ресторанов и заказов, "
+        "для которых их ещё нет или они устарели"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=10,
+            help="Не больше стольких запросов к геокодеру в секунду",
+        )
+        parser.add_argument("--chunk-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        self.rate_limiter = RateLimiter(options["rate"])
+        self.geocoder = get_geocoder()
+        self.zones = list(DeliveryZone.objects.all())
+
+        started_at = time.monotonic()
+        geocoded = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk in self.iter_stale_addresses(options["chunk_size"]):
+                locations = [
+                    location
+                    for location in executor.map(self.geocode, chunk)
+                    if location
+                ]
+                self.save_locations(locations)
+                geocoded += len(locations)
+                failed += len(chunk) - len(locations)
+
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f"Обработано адресов: {geocoded + failed}, "
+                    f"ошибок: {failed}, "
+                    f"{(geocoded + failed) / elapsed:.1f} адресов/с"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: {geocoded} адресов за "
+                f"{time.monotonic() - started_at:.1f} с"
+            )
+        )
+
+    def iter_addresses(self):
+        seen_keys = set()
+        querysets = [
+            Restaurant.objects.values_list("address", flat=True),
+            Order.objects.values_list("address", flat=True),
+        ]
+        for queryset in querysets:
+            for address in queryset.distinct().iterator():
+                if not address:
+                    continue
+                address_key = get_address_key(address)
+                if address_key in seen_keys:
+                    continue
+                seen_keys.add(address_key)
+                yield address_key, address
+
+    def iter_stale_addresses(self, chunk_size):
+        addresses = self.iter_addresses()
+        while chunk := dict(islice(addresses, chunk_size)):
+            fresh_keys = {
+                location.address_key
+                for location in Location.objects.filter(
+                    address_key__in=chunk.keys()
+                )
+                if is_fresh(location)
+            }
+            stale_addresses = [
+                address
+                for address_key, address in chunk.items()
+                if address_key not in fresh_keys
+            ]
+            if stale_addresses:
+                yield stale_addresses
+
+    def geocode(self, address):
+        self.rate_limiter.wait()
+        try:
+            latitude, longitude = self.geocoder.geocode(address)
+        except GeocoderError as error:
+            self.stderr.write(f"{address}: {error}")
+            return None
+
+        return Location(
+            address=address,
+            address_key=get_address_key(address),
+            latitude=latitude,
+            longitude=longitude,
+            updated_at=timezone.now(),
+            zone=find_zone(latitude, longitude, self.zones),
+        )
+
+    def save_locations(self, locations):
+        Location.objects.bulk_create(
+            locations,
+            update_conflicts=True,
+            unique_fields=["address_key"],
+            update_fields=["latitude", "longitude", "updated_at", "zone"],
+        )
+        GeocodingTask.objects.filter(
+            address_key__in=[location.address_key for location in locations]
+        ).delete()
+        for location in locations:
+            cache_location(location)
@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from location.geocoders import GeocoderError, GeocoderUnavailable
+from location.geocoding import ensure_location
+from location.models import GeocodingTask, Location
+
+TASK_LEASE = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = "Геокодирует адреса, поставленные в очередь при создании заказов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать накопившуюся очередь и завершиться",
+        )
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=60,
+            help="Начальная пауза в секундах перед повторной попыткой",
+        )
+
+    def handle(self, *args, **options):
+        self.max_attempts = options["max_attempts"]
+        self.retry_delay = options["retry_delay"]
+        while True:
+            tasks = self.claim_tasks(options["batch_size"])
+            for task in tasks:
+                self.process_task(task)
+            if tasks:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+    def claim_tasks(self, batch_size):
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                GeocodingTask.objects.select_for_update(skip_locked=True)
+                .filter(next_attempt_at__lte=now)
+                .order_by("next_attempt_at")[:batch_size]
+            )
+            GeocodingTask.objects.filter(
+                pk__in=[task.pk for task in tasks]
+            ).update(
+                next_attempt_at=now + TASK_LEASE,
+                attempts=F("attempts") + 1,
+            )
+        return tasks
+
+    def process_task(self, task):
+        try:
+            ensure_location(task.address)
+        except GeocoderError as error:
+            self.postpone_task(task, error)
+            return
+        except Exception as error:
+            self.stderr.write(f"{task.address}: {error!r}")
+            self.postpone_task(task, error)
+            return
+        task.delete()
+
+    def postpone_task(self, task, error):
+        attempts = task.attempts + 1
+        if isinstance(error, GeocoderUnavailable):
+            attempts = task.attempts
+        elif attempts >= self.max_attempts:
+            locations = Location.objects.filter(address_key=task.address_key)
+            if not locations.exists():
+                Location.objects.create(
+                    address=task.address, updated_at=timezone.now()
+                )
+            task.delete()
+            self.stderr.write(f"{task.address}: {error}")
+            return
+
+        backoff = 2 ** max(attempts - 1, 0)
+        delay = timedelta(seconds=self.retry_delay * backoff)
+        GeocodingTask.objects.filter(pk=task.pk).update(
+            next_attempt_at=timezone.now() + delay,
+            attempts=attempts,
+            last_error=str(error),
+        )
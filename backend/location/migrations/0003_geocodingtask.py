@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0002_remove_location_unigue_coordinates_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodingTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.TextField(max_length=200, unique=True, verbose_name='Адрес')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата/время постановки в очередь')),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата/время следующей попытки')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Задача геокодирования',
+                'verbose_name_plural': 'Очередь геокодирования',
+            },
+        ),
+    ]
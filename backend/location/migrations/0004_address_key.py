@@ -0,0 +1,95 @@
+from django.db import migrations, models
+
+from location.tools import get_address_key
+
+
+def is_better_location(location, other):
+    return (
+        location.latitude is not None,
+        location.updated_at is not None,
+        location.updated_at or location.id,
+        location.id,
+    ) > (
+        other.latitude is not None,
+        other.updated_at is not None,
+        other.updated_at or other.id,
+        other.id,
+    )
+
+
+def fill_address_keys(apps, schema_editor):
+    Location = apps.get_model('location', 'Location')
+    GeocodingTask = apps.get_model('location', 'GeocodingTask')
+
+    best_locations = {}
+    duplicate_ids = []
+    for location in Location.objects.order_by('id').iterator():
+        location.address_key = get_address_key(location.address)
+        best_location = best_locations.get(location.address_key)
+        if best_location is None:
+            best_locations[location.address_key] = location
+        elif is_better_location(location, best_location):
+            best_locations[location.address_key] = location
+            duplicate_ids.append(best_location.id)
+        else:
+            duplicate_ids.append(location.id)
+    for start in range(0, len(duplicate_ids), 1000):
+        Location.objects.filter(
+            id__in=duplicate_ids[start:start + 1000]
+        ).delete()
+    Location.objects.bulk_update(
+        best_locations.values(), ['address_key'], batch_size=1000
+    )
+
+    tasks = {}
+    duplicate_ids = []
+    for task in GeocodingTask.objects.order_by('id').iterator():
+        task.address_key = get_address_key(task.address)
+        if task.address_key in tasks:
+            duplicate_ids.append(task.id)
+        else:
+            tasks[task.address_key] = task
+    GeocodingTask.objects.filter(id__in=duplicate_ids).delete()
+    GeocodingTask.objects.bulk_update(
+        tasks.values(), ['address_key'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0003_geocodingtask'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='location',
+            name='unigue_location_coordinates',
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='address_key',
+            field=models.CharField(editable=False, max_length=40, null=True, verbose_name='Ключ адреса'),
+        ),
+        migrations.AddField(
+            model_name='geocodingtask',
+            name='address_key',
+            field=models.CharField(editable=False, max_length=40, null=True, verbose_name='Ключ адреса'),
+        ),
+        migrations.AlterField(
+            model_name='geocodingtask',
+            name='address',
+            field=models.TextField(max_length=200, verbose_name='Адрес'),
+        ),
+        migrations.RunPython(fill_address_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='location',
+            name='address_key',
+            field=models.CharField(editable=False, max_length=40, unique=True, verbose_name='Ключ адреса'),
+        ),
+        migrations.AlterField(
+            model_name='geocodingtask',
+            name='address_key',
+            field=models.CharField(editable=False, max_length=40, unique=True, verbose_name='Ключ адреса'),
+        ),
+    ]
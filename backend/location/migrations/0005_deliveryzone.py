@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0004_address_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Название')),
+                ('latitude', models.FloatField(verbose_name='Широта центра')),
+                ('longitude', models.FloatField(verbose_name='Долгота центра')),
+                ('radius_km', models.FloatField(verbose_name='Радиус, км')),
+            ],
+            options={
+                'verbose_name': 'Зона доставки',
+                'verbose_name_plural': 'Зоны доставки',
+            },
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='zone',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='locations', to='location.deliveryzone', verbose_name='Зона доставки'),
+        ),
+    ]
@@ -1,23 +1,96 @@
 from django.db import models
+from django.utils import timezone
+from geopy.distance import great_circle
+
+from .tools import get_address_key
+
+
+class DeliveryZone(models.Model):
+    name = models.CharField("Название", max_length=50)
+    latitude = models.FloatField("Широта центра")
+    longitude = models.FloatField("Долгота центра")
+    radius_km = models.FloatField("Радиус, км")
+
+    class Meta:
+        verbose_name = "Зона доставки"
+        verbose_name_plural = "Зоны доставки"
+
+    def __str__(self):
+        return self.name
+
+
+def find_zone(latitude, longitude, zones=None):
+    if latitude is None or longitude is None:
+        return None
+    if zones is None:
+        zones = DeliveryZone.objects.all()
+
+    nearest_zone, nearest_distance = None, None
+    for zone in zones:
+        zone_distance = great_circle(
+            (latitude, longitude), (zone.latitude, zone.longitude)
+        ).km
+        if zone_distance > zone.radius_km:
+            continue
+        if nearest_zone is None or zone_distance < nearest_distance:
+            nearest_zone, nearest_distance = zone, zone_distance
+    return nearest_zone
 
 
 class Location(models.Model):
     address = models.TextField("Адрес места", max_length=200)
+    address_key = models.CharField(
+        "Ключ адреса", max_length=40, unique=True, editable=False
+    )
     latitude = models.FloatField("Широта", null=True, blank=True)
     longitude = models.FloatField("Долгота", null=True, blank=True)
     updated_at = models.DateTimeField(
         "Дата/время обновления", null=True, blank=True, db_index=True
     )
+    zone = models.ForeignKey(
+        DeliveryZone,
+        related_name="locations",
+        verbose_name="Зона доставки",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
-        constraints = [
-            models.UniqueConstraint(
-                fields=["address", "latitude", "longitude"],
-                name="unigue_location_coordinates",
-            ),
-        ]
         verbose_name = "Локация"
         verbose_name_plural = "Локации"
 
     def __str__(self):
         return f"{self.latitude},{self.longitude} {self.address}"
+
+    def save(self, *args, **kwargs):
+        self.address_key = get_address_key(self.address)
+        self.zone = find_zone(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+
+class GeocodingTask(models.Model):
+    address = models.TextField("Адрес", max_length=200)
+    address_key = models.CharField(
+        "Ключ адреса", max_length=40, unique=True, editable=False
+    )
+    created_at = models.DateTimeField(
+        "Дата/время постановки в очередь", auto_now_add=True
+    )
+    next_attempt_at = models.DateTimeField(
+        "Дата/время следующей попытки", default=timezone.now, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        verbose_name = "Задача геокодирования"
+        verbose_name_plural = "Очередь геокодирования"
+
+    def __str__(self):
+        return self.address
+
+    def save(self, *args, **kwargs):
+        self.address_key = get_address_key(self.address)
+        super().save(*args, **kwargs)
@@ -0,0 +1,96 @@
+import math
+from collections import defaultdict
+
+from .distances import EARTH_RADIUS_KM, has_coordinates, haversine_matrix
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GridIndex:
+    def __init__(self, points, cell_km=10):
+        self.cell_degrees = cell_km / KM_PER_DEGREE
+        self._cells = defaultdict(list)
+        self._points = {}
+        for key, coordinates in points.items():
+            if not has_coordinates(coordinates):
+                continue
+            self._points[key] = coordinates
+            self._cells[self._get_cell(*coordinates)].append(key)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def __len__(self):
+        return len(self._points)
+
+    def _get_cell(self, lat, lon):
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor(lon / self.cell_degrees),
+        )
+
+    def _get_ring(self, center, radius):
+        row, column = center
+        if radius == 0:
+            return [center]
+        if 8 * radius > len(self._cells):
+            return [
+                cell
+                for cell in self._cells
+                if max(abs(cell[0] - row), abs(cell[1] - column)) == radius
+            ]
+        ring = []
+        for offset in range(-radius, radius + 1):
+            ring.append((row - radius, column + offset))
+            ring.append((row + radius, column + offset))
+        for offset in range(-radius + 1, radius):
+            ring.append((row + offset, column - radius))
+            ring.append((row + offset, column + radius))
+        return ring
+
+    def _get_ring_distance(self, lat, radius):
+        if radius <= 1:
+            return 0
+        farthest_lat = min(90, abs(lat) + (radius + 1) * self.cell_degrees)
+        return (
+            (radius - 1)
+            * self.cell_degrees
+            * KM_PER_DEGREE
+            * math.cos(math.radians(farthest_lat))
+        )
+
+    def nearest(self, lat, lon, k=None, max_km=None, keys=None):
+        center = self._get_cell(lat, lon)
+        found = []
+        seen = 0
+        radius = 0
+        while seen < len(self._points):
+            ring_distance = self._get_ring_distance(lat, radius)
+            if max_km is not None and ring_distance > max_km:
+                break
+            if k is not None and len(found) >= k:
+                found.sort(key=lambda item: item[1])
+                if found[k - 1][1] <= ring_distance:
+                    break
+
+            ring_keys = [
+                key
+                for cell in self._get_ring(center, radius)
+                for key in self._cells.get(cell, ())
+            ]
+            seen += len(ring_keys)
+            if keys is not None:
+                ring_keys = [key for key in ring_keys if key in keys]
+            if ring_keys:
+                distances = haversine_matrix(
+                    [(lat, lon)], [self._points[key] for key in ring_keys]
+                )[0]
+                found.extend(
+                    (key, float(distance))
+                    for key, distance in zip(ring_keys, distances)
+                    if max_km is None or distance <= max_km
+                )
+            radius += 1
+
+        found.sort(key=lambda item: item[1])
+        return found[:k] if k is not None else found
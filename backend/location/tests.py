@@ -1,3 +1,170 @@
-from django.test import TestCase
+import random
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from .distances import haversine_matrix
+from .geocoders import GeocoderError, GeocoderUnavailable, YandexGeocoder
+from .geocoding import GeocodingCache, enqueue_geocoding
+from .models import GeocodingTask
+from .spatial import GridIndex
+
+
+class GridIndexTest(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.points = {
+            key: (rng.uniform(55.0, 56.5), rng.uniform(36.5, 38.5))
+            for key in range(300)
+        }
+        self.points["far"] = (59.9, 30.3)
+        self.points["unknown"] = (None, None)
+        self.origins = [
+            (rng.uniform(55.0, 56.5), rng.uniform(36.5, 38.5))
+            for _ in range(20)
+        ]
+
+    def scan(self, origin, max_km=None, keys=None):
+        points = {
+            key: coordinates
+            for key, coordinates in self.points.items()
+            if None not in coordinates and (keys is None or key in keys)
+        }
+        distances = haversine_matrix([origin], list(points.values()))[0]
+        found = [
+            (key, float(distance))
+            for key, distance in zip(points, distances)
+            if max_km is None or distance <= max_km
+        ]
+        return sorted(found, key=lambda item: item[1])
+
+    def assertSameNearest(self, found, expected):
+        self.assertEqual(len(found), len(expected))
+        for (_, distance), (_, expected_distance) in zip(found, expected):
+            self.assertAlmostEqual(distance, expected_distance)
+        self.assertEqual(
+            {key for key, _ in found}, {key for key, _ in expected}
+        )
+
+    def test_skips_points_without_coordinates(self):
+        index = GridIndex(self.points)
+
+        self.assertNotIn("unknown", index)
+        self.assertEqual(len(index), 301)
+
+    def test_nearest_matches_full_scan(self):
+        index = GridIndex(self.points, cell_km=5)
+        for origin in self.origins:
+            self.assertSameNearest(index.nearest(*origin), self.scan(origin))
+
+    def test_nearest_k_matches_full_scan(self):
+        index = GridIndex(self.points, cell_km=5)
+        for origin in self.origins:
+            self.assertSameNearest(
+                index.nearest(*origin, k=5), self.scan(origin)[:5]
+            )
+
+    def test_nearest_within_distance_matches_full_scan(self):
+        index = GridIndex(self.points)
+        keys = set(range(0, 300, 3))
+        for origin in self.origins:
+            self.assertSameNearest(
+                index.nearest(*origin, max_km=30, keys=keys),
+                self.scan(origin, max_km=30, keys=keys),
+            )
+
+
+class GeocodingCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.geocoding_cache = GeocodingCache(
+            maxsize=10, ttl=3600, negative_ttl=60, local_ttl=60
+        )
+        self.address = "Москва, Тверская 1"
+        self.key = self.geocoding_cache.get_cache_key(self.address)
+
+    def test_local_entries_are_rechecked_against_shared_cache(self):
+        expires_at = time.time() + 3600
+        self.geocoding_cache.set(self.address, (55.75, 37.6), expires_at)
+        # Another process corrects the coordinates in the shared tier only
+        cache.set(self.key, ((55.76, 37.61), expires_at))
+
+        self.assertEqual(self.geocoding_cache.get(self.address), (55.75, 37.6))
+        later = time.time() + 61
+        with mock.patch("location.geocoding.time.time", return_value=later):
+            self.assertEqual(
+                self.geocoding_cache.get(self.address), (55.76, 37.61)
+            )
+            self.assertEqual(
+                self.geocoding_cache.get_many([self.address]),
+                {self.address: (55.76, 37.61)},
+            )
+
+
+class YandexGeocoderTest(SimpleTestCase):
+    def setUp(self):
+        self.geocoder = YandexGeocoder(api_key="key", failure_threshold=2)
+        self.response = mock.Mock()
+        patcher = mock.patch.object(
+            self.geocoder.session, "get", return_value=self.response
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond_with_pos(self, pos):
+        self.response.json.return_value = {
+            "response": {
+                "GeoObjectCollection": {
+                    "featureMember": [{"GeoObject": {"Point": {"pos": pos}}}]
+                }
+            }
+        }
+
+    def test_parses_coordinates(self):
+        self.respond_with_pos("37.6 55.75")
+
+        self.assertEqual(
+            self.geocoder.geocode("Москва, Тверская 1"), (55.75, 37.6)
+        )
+
+    def test_unexpected_responses_open_circuit(self):
+        self.response.json.return_value = {"response": {}}
+        with self.assertRaises(GeocoderError):
+            self.geocoder.geocode("Москва, Тверская 1")
+
+        self.respond_with_pos("нет координат")
+        with self.assertRaises(GeocoderError):
+            self.geocoder.geocode("Москва, Тверская 1")
+
+        self.respond_with_pos("37.6 55.75")
+        with self.assertRaises(GeocoderUnavailable):
+            self.geocoder.geocode("Москва, Тверская 1")
+
+
+class ProcessGeocodingQueueTest(TestCase):
+    def test_unexpected_error_postpones_only_the_failing_task(self):
+        enqueue_geocoding(["Москва, Тверская 1", "Москва, Тверская 2"])
+        failing_task = GeocodingTask.objects.get(address="Москва, Тверская 1")
+
+        def ensure_location(address):
+            if address == failing_task.address:
+                raise IntegrityError("duplicate key value")
+
+        with mock.patch(
+            "location.management.commands.process_geocoding_queue"
+            ".ensure_location",
+            side_effect=ensure_location,
+        ):
+            call_command(
+                "process_geocoding_queue", "--once", stderr=StringIO()
+            )
+
+        task = GeocodingTask.objects.get()
+        self.assertEqual(task.pk, failing_task.pk)
+        self.assertEqual(task.attempts, 1)
+        self.assertIn("duplicate key value", task.last_error)
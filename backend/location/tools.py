@@ -0,0 +1,35 @@
+import re
+from hashlib import sha1
+
+ADDRESS_SEPARATORS = re.compile(r"[\s.,;:\"'«»()№#]+")
+ADDRESS_ABBREVIATIONS = {
+    "город": "г",
+    "улица": "ул",
+    "проспект": "пр",
+    "пр-т": "пр",
+    "пр-кт": "пр",
+    "переулок": "пер",
+    "бульвар": "б-р",
+    "шоссе": "ш",
+    "площадь": "пл",
+    "набережная": "наб",
+    "дом": "д",
+    "корпус": "к",
+    "корп": "к",
+    "строение": "стр",
+    "квартира": "кв",
+}
+
+
+def normalize_address(address):
+    address = address.lower().replace("ё", "е")
+    words = [
+        ADDRESS_ABBREVIATIONS.get(word, word)
+        for word in ADDRESS_SEPARATORS.split(address)
+        if word
+    ]
+    return " ".join(words)
+
+
+def get_address_key(address):
+    return sha1(normalize_address(address).encode()).hexdigest()
@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def _encode(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def _decode(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+
+def encode_cursor(order):
+    return _encode(
+        [order.status_priority, order.created_at.isoformat(), order.id]
+    )
+
+
+def decode_cursor(cursor):
+    try:
+        status_priority, created_at, order_id = _decode(cursor)
+        return (
+            int(status_priority),
+            datetime.fromisoformat(created_at),
+            int(order_id),
+        )
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def encode_feed_cursor(updated_at, order_id):
+    return _encode([updated_at.isoformat(), order_id])
+
+
+def decode_feed_cursor(cursor):
+    try:
+        updated_at, order_id = _decode(cursor)
+        return datetime.fromisoformat(updated_at), int(order_id)
+    except (binascii.Error, ValueError, TypeError):
+        return None
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from location.models import Location
+
+from .pagination import (
+    decode_cursor,
+    decode_feed_cursor,
+    encode_cursor,
+    encode_feed_cursor,
+)
+
+
+class CursorTest(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, timezone.utc)
+        order = SimpleNamespace(
+            status_priority=2, created_at=created_at, id=17
+        )
+
+        self.assertEqual(
+            decode_cursor(encode_cursor(order)), (2, created_at, 17)
+        )
+
+    def test_feed_cursor_round_trip(self):
+        updated_at = datetime(2024, 5, 1, 12, 30, 15, 123456, timezone.utc)
+
+        self.assertEqual(
+            decode_feed_cursor(encode_feed_cursor(updated_at, 42)),
+            (updated_at, 42),
+        )
+
+    def test_invalid_cursors(self):
+        for cursor in ["", "not base64!", "W10=", "WyJhIiwgMSwgMl0="]:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor))
+                self.assertIsNone(decode_feed_cursor(cursor))
+
+
+@override_settings(ORDERS_PAGE_SIZE=3)
+class OrderPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            "manager", password="manager", is_staff=True
+        )
+        for number, status in enumerate(
+            ["delivering", "accepted", "prepared", "accepted", "completed"]
+            * 2
+        ):
+            Order.objects.create(
+                status=status,
+                firstname=f"Клиент {number}",
+                lastname="Тестов",
+                phonenumber="+79161234567",
+                address="Москва, Тверская 1",
+            )
+
+    def test_pages_cover_active_orders_once_in_priority_order(self):
+        self.client.force_login(self.manager)
+        url = reverse("restaurateur:view_orders")
+
+        seen_ids = []
+        query = {}
+        while True:
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            order_items = response.context["order_items"]
+            self.assertLessEqual(len(order_items), 3)
+            seen_ids.extend(order_item["id"] for order_item in order_items)
+            next_page_url = response.context["next_page_url"]
+            if not next_page_url:
+                break
+            query = parse_qs(urlparse(next_page_url).query)
+
+        expected_ids = list(
+            Order.objects.active().by_priority().values_list("id", flat=True)
+        )
+        self.assertEqual(len(expected_ids), 8)
+        self.assertEqual(seen_ids, expected_ids)
+
+
+class OrderFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            "manager", password="manager", is_staff=True
+        )
+        product = Product.objects.create(
+            name="Бургер", price=100, image="burger.png"
+        )
+        restaurant = Restaurant.objects.create(
+            name="Бургерная на Тверской", address="Москва, Тверская 1"
+        )
+        RestaurantMenuItem.objects.create(
+            restaurant=restaurant, product=product
+        )
+        cls.order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79161234567",
+            address="Москва, Новый Арбат 24",
+        )
+        OrderItem.objects.create(
+            order=cls.order, product=product, quantity=1, price=100
+        )
+
+    def get_feed(self, cursor):
+        self.client.force_login(self.manager)
+        response = self.client.get(
+            reverse("restaurateur:view_orders_feed"), {"since": cursor}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_seen_cursor(self):
+        self.order.refresh_from_db()
+        return encode_feed_cursor(self.order.updated_at, self.order.id)
+
+    def test_resends_order_after_background_candidate_refresh(self):
+        cursor = self.get_seen_cursor()
+        self.assertEqual(self.get_feed(cursor)["orders"], [])
+
+        call_command("process_candidate_queue", "--once")
+
+        orders = self.get_feed(cursor)["orders"]
+        self.assertEqual([order["id"] for order in orders], [self.order.id])
+        self.assertIn("Бургерная на Тверской", orders[0]["html"])
+
+    def test_resends_order_after_address_is_geocoded(self):
+        call_command("process_candidate_queue", "--once")
+        cursor = self.get_seen_cursor()
+
+        Location.objects.create(
+            address=self.order.address,
+            latitude=55.752,
+            longitude=37.587,
+            updated_at=django_timezone.now(),
+        )
+
+        orders = self.get_feed(cursor)["orders"]
+        self.assertEqual([order["id"] for order in orders], [self.order.id])
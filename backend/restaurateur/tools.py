@@ -1,15 +1,16 @@
 import requests
 
 
-def fetch_coordinates(apikey, address):
+def fetch_coordinates(apikey, address, session=requests, timeout=None):
     base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(
+    response = session.get(
         base_url,
         params={
             "geocode": address,
             "apikey": apikey,
             "format": "json",
         },
+        timeout=timeout,
     )
     response.raise_for_status()
     found_places = response.json()["response"]["GeoObjectCollection"][
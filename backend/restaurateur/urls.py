@@ -14,6 +14,12 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/feed/', views.view_orders_feed, name="view_orders_feed"),
+    path(
+        'orders/transition/',
+        views.transition_orders,
+        name="transition_orders",
+    ),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
@@ -1,25 +1,50 @@
+from datetime import timedelta
+
 import requests
 from django import forms
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import user_passes_test
+from django.db.models import F, Prefetch
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import View
-from geopy import distance
+from django.views.decorators.http import require_POST
 
 from foodcartapp.models import (
+    ACTIVE_ORDER_STATUSES,
     Order,
+    OrderCandidate,
     Product,
     Restaurant,
-    RestaurantMenuItem,
 )
-from location.models import Location
+from location.geocoding import NOT_FOUND, lookup_many_coordinates
+from location.models import DeliveryZone
 from star_burger.settings import YAGEO_API_KEY
 
+from .pagination import (
+    decode_cursor,
+    decode_feed_cursor,
+    encode_cursor,
+    encode_feed_cursor,
+)
 from .tools import fetch_coordinates
 
+FEED_SETTLE_WINDOW = timedelta(seconds=10)
+FEED_BATCH_SIZE = 100
+ORDER_CANDIDATES = Prefetch(
+    "candidates",
+    queryset=OrderCandidate.objects.select_related("restaurant").order_by(
+        F("distance").asc(nulls_last=True), "id"
+    ),
+)
+
 
 class Login(forms.Form):
     username = forms.CharField(
@@ -43,6 +68,73 @@ class Login(forms.Form):
     )
 
 
+class OrderFilterForm(forms.Form):
+    zone = forms.ModelChoiceField(
+        label="Зона доставки",
+        required=False,
+        queryset=DeliveryZone.objects.order_by("name"),
+        empty_label="Все",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    status = forms.ChoiceField(
+        label="Статус",
+        required=False,
+        choices=[("", "Все")]
+        + [
+            (status, title)
+            for status, title in Order.STATUSES
+            if status in ACTIVE_ORDER_STATUSES
+        ],
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    restaurant = forms.ModelChoiceField(
+        label="Ресторан",
+        required=False,
+        queryset=Restaurant.objects.order_by("name"),
+        empty_label="Все",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    payment = forms.ChoiceField(
+        label="Способ оплаты",
+        required=False,
+        choices=[("", "Все")] + Order.PAYMENT,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+
+class OrderTransitionForm(forms.Form):
+    orders = forms.ModelMultipleChoiceField(queryset=Order.objects.active())
+    status = forms.ChoiceField(
+        label="Новый статус",
+        choices=[
+            (status, title)
+            for status, title in Order.STATUSES
+            if status != "accepted"
+        ],
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    restaurant = forms.ModelChoiceField(
+        label="Ресторан",
+        required=False,
+        queryset=Restaurant.objects.order_by("name"),
+        empty_label="Не назначать",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        is_prepared = cleaned_data.get("status") == "prepared"
+        if cleaned_data.get("restaurant") and not is_prepared:
+            raise forms.ValidationError(
+                "Ресторан назначается только при передаче заказа в работу"
+            )
+        if is_prepared and not cleaned_data.get("restaurant"):
+            raise forms.ValidationError(
+                "Чтобы передать заказ в работу, выберите ресторан"
+            )
+        return cleaned_data
+
+
 class LoginView(View):
     def get(self, request, *args, **kwargs):
         form = Login()
@@ -121,73 +213,200 @@ def view_restaurants(request):
     )
 
 
-@user_passes_test(is_manager, login_url="restaurateur:login")
-def view_orders(request):
-    products_in_restaurants = RestaurantMenuItem.objects.filter(
-        availability=True
-    ).prefetch_related("product")
-
-    restaurants = Restaurant.objects.all()
-    restaurants_coords = {}
-    for restaurant in restaurants:
-        location = Location.objects.get(address=restaurant.address)
-        restaurants_coords[restaurant.name] = (
-            location.latitude,
-            location.longitude,
-        )
-
-    orders = (
-        Order.objects.exclude(status__in=["completed", "canceled"])
-        .fetch_with_total_amounts()
-        .order_by("status")
-        .prefetch_related("order_items")
-    )
+def serialize_orders(orders):
+    coordinates = lookup_many_coordinates(order.address for order in orders)
 
     order_items = []
     for order in orders:
-        order_products = [item.product for item in order.order_items.all()]
-        restaurants_count = {restaurant: 0 for restaurant in restaurants}
-
-        for product_in_restaurant in products_in_restaurants:
-            if product_in_restaurant.product in order_products:
-                restaurants_count[product_in_restaurant.restaurant] += 1
-
-        location = Location.objects.get(address=order.address)
-        order_address_coords = (location.latitude, location.longitude)
-
+        order_address_coords = coordinates[order.address]
         restaurants_available = {
-            restaurant.name: round(
-                distance.distance(
-                    order_address_coords, restaurants_coords[restaurant.name]
-                ).km,
-                3,
+            candidate.restaurant.name: (
+                round(candidate.distance, 3)
+                if candidate.distance is not None
+                else None
             )
-            for restaurant, count in restaurants_count.items()
-            if count == len(order_products)
+            for candidate in order.candidates.all()
         }
-        restaurants_available_sorted = dict(
-            sorted(restaurants_available.items(), key=lambda item: item[1])
-        )
 
         order_items.append(
             {
                 "id": order.id,
                 "status": order.get_status_display(),
                 "payment": order.get_payment_display(),
-                "order_amount": order.order_amount,
+                "order_amount": order.total,
                 "client": f"{order.firstname} {order.lastname}",
                 "phonenumber": order.phonenumber,
                 "address": order.address,
+                "coordinates_pending": order_address_coords is None,
+                "address_not_found": order_address_coords == NOT_FOUND,
                 "comment": order.comment,
-                "restaurants": restaurants_available_sorted,
+                "restaurants": restaurants_available,
                 "order_restaurant": order.restaurant.name
                 if order.restaurant
                 else None,
             }
         )
 
+    return order_items
+
+
+def filter_orders(orders, filter_form):
+    if not filter_form.is_valid():
+        return orders
+    filters = filter_form.cleaned_data
+    if filters["zone"]:
+        orders = orders.filter(zone=filters["zone"])
+    if filters["status"]:
+        orders = orders.filter(status=filters["status"])
+    if filters["restaurant"]:
+        orders = orders.filter(restaurant=filters["restaurant"])
+    if filters["payment"]:
+        orders = orders.filter(payment=filters["payment"])
+    return orders
+
+
+def get_settled_position(position):
+    settled_position = (timezone.now() - FEED_SETTLE_WINDOW, 0)
+    return min(position, settled_position)
+
+
+def get_feed_cursor():
+    last_change = (
+        Order.objects.order_by("-updated_at", "-id")
+        .only("updated_at")
+        .first()
+    )
+    if not last_change:
+        return encode_feed_cursor(timezone.now() - FEED_SETTLE_WINDOW, 0)
+    return encode_feed_cursor(
+        *get_settled_position((last_change.updated_at, last_change.id))
+    )
+
+
+@user_passes_test(is_manager, login_url="restaurateur:login")
+def view_orders(request):
+    feed_cursor = get_feed_cursor()
+    filter_form = OrderFilterForm(request.GET)
+    orders = filter_orders(
+        Order.objects.active()
+        .by_priority()
+        .select_related("restaurant")
+        .prefetch_related(ORDER_CANDIDATES),
+        filter_form,
+    )
+
+    position = decode_cursor(request.GET.get("cursor", ""))
+    if position:
+        orders = orders.after(*position)
+
+    orders = list(orders[: settings.ORDERS_PAGE_SIZE + 1])
+    next_page_url = None
+    if len(orders) > settings.ORDERS_PAGE_SIZE:
+        orders = orders[: settings.ORDERS_PAGE_SIZE]
+        query = request.GET.copy()
+        query["cursor"] = encode_cursor(orders[-1])
+        next_page_url = f"?{query.urlencode()}"
+
+    first_page_query = request.GET.copy()
+    first_page_query.pop("cursor", None)
+
     return render(
         request,
         template_name="order_items.html",
-        context={"order_items": order_items},
+        context={
+            "order_items": serialize_orders(orders),
+            "filter_form": filter_form,
+            "next_page_url": next_page_url,
+            "first_page_url": f"?{first_page_query.urlencode()}",
+            "is_first_page": position is None,
+            "feed_cursor": feed_cursor,
+            "transition_form": OrderTransitionForm(),
+            "next_url": request.get_full_path(),
+        },
+    )
+
+
+@user_passes_test(is_manager, login_url="restaurateur:login")
+def view_orders_feed(request):
+    position = decode_feed_cursor(request.GET.get("since", ""))
+    if not position:
+        return JsonResponse({"error": "Некорректный курсор"}, status=400)
+
+    changed_orders = list(
+        Order.objects.changed_since(*position)
+        .select_related("restaurant")
+        .prefetch_related(ORDER_CANDIDATES)[:FEED_BATCH_SIZE]
+    )
+    if not changed_orders:
+        return JsonResponse(
+            {"cursor": request.GET["since"], "orders": [], "removed": []}
+        )
+
+    visible_ids = set(
+        filter_orders(
+            Order.objects.active().filter(
+                id__in=[order.id for order in changed_orders]
+            ),
+            OrderFilterForm(request.GET),
+        ).values_list("id", flat=True)
+    )
+    visible_orders = [
+        order for order in changed_orders if order.id in visible_ids
+    ]
+    next_url = request.GET.get("next") or reverse("restaurateur:view_orders")
+    # Rows saved in the last few seconds may still be joined by slower
+    # transactions with earlier updated_at, so they are sent again until
+    # they settle
+    last_change = changed_orders[-1]
+    next_position = max(
+        position,
+        get_settled_position((last_change.updated_at, last_change.id)),
+    )
+
+    return JsonResponse(
+        {
+            "cursor": encode_feed_cursor(*next_position),
+            "orders": [
+                {
+                    "id": item["id"],
+                    "html": render_to_string(
+                        "order_row.html",
+                        {"item": item, "next_url": next_url},
+                        request,
+                    ),
+                }
+                for item in serialize_orders(visible_orders)
+            ],
+            "removed": [
+                order.id
+                for order in changed_orders
+                if order.id not in visible_ids
+            ],
+        }
     )
+
+
+@require_POST
+@user_passes_test(is_manager, login_url="restaurateur:login")
+def transition_orders(request):
+    form = OrderTransitionForm(request.POST)
+    if form.is_valid():
+        orders = form.cleaned_data["orders"]
+        selected = len(orders)
+        transitioned = orders.transition(
+            form.cleaned_data["status"], form.cleaned_data["restaurant"]
+        )
+        messages.success(
+            request,
+            f"Статус изменён у заказов: {transitioned}, "
+            f"пропущено: {selected - transitioned}",
+        )
+    else:
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}):
+        next_url = reverse("restaurateur:view_orders")
+    return redirect(next_url)
@@ -85,6 +85,23 @@ MEDIA_URL = "/media/"
 
 DATABASES = {"default": env.dj_db_url("DATABASE_URL")}
 
+CACHES = {"default": env.dj_cache_url("CACHE_URL", "locmem://")}
+
+GEOCODER = {
+    "BACKEND": env("GEOCODER_BACKEND", "location.geocoders.YandexGeocoder"),
+    "OPTIONS": env.json("GEOCODER_OPTIONS", {}),
+}
+GEOCODER_CACHE_SIZE = env.int("GEOCODER_CACHE_SIZE", 10000)
+GEOCODER_CACHE_TTL = env.int("GEOCODER_CACHE_TTL", 30 * 24 * 60 * 60)
+GEOCODER_NEGATIVE_CACHE_TTL = env.int("GEOCODER_NEGATIVE_CACHE_TTL", 60 * 60)
+GEOCODER_LOCAL_CACHE_TTL = env.int("GEOCODER_LOCAL_CACHE_TTL", 60)
+
+PRECISE_DISTANCES_TOP_N = env.int("PRECISE_DISTANCES_TOP_N", 0)
+MAX_DELIVERY_DISTANCE_KM = env.float("MAX_DELIVERY_DISTANCE_KM", 100)
+ORDERS_PAGE_SIZE = env.int("ORDERS_PAGE_SIZE", 50)
+
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",